@@ -6,8 +6,9 @@ import { fileURLToPath } from 'url';
 console.log('Starting cleanup-old-episodes.js script...');
 
 function isOldEpisode(filename, cutoffDate) {
-  // Match files like 2025-04-12.mp3
-  const match = filename.match(/^(\d{4}-\d{2}-\d{2})\.mp3$/);
+  // Match files like 2025-04-12.mp3 and its renditions and sidecar
+  // (2025-04-12.64k.mp3, 2025-04-12.opus, 2025-04-12.renditions.json, ...)
+  const match = filename.match(/^(\d{4}-\d{2}-\d{2})(\.[\w-]+)*\.(mp3|opus|json)$/);
   if (!match) return false;
   const fileDate = new Date(match[1]);
   return fileDate < cutoffDate;
@@ -44,6 +44,7 @@ function generateEpisodeEntries() {
                 const pubDate = moment(date).format('ddd, DD MMM YYYY HH:mm:ss ZZ');
                 const title = `SA News for ${moment(date).format('D MMM YYYY')}`;
                 const stats = fs.statSync(path.join(publicDir, file));
+                const renditions = readRenditions(publicDir, date);
                 
                 return {
                     title,
@@ -51,8 +52,10 @@ function generateEpisodeEntries() {
                     pubDate,
                     filename: file,
                     guid: date,
-                    duration: '00:05:00',
-                    length: stats.size
+                    duration: renditions ? formatDuration(renditions.duration_seconds) : '00:05:00',
+                    length: stats.size,
+                    // Smaller variants (low-bitrate MP3, Opus) encoded alongside the MP3
+                    alternates: renditions ? renditions.renditions.filter(r => r.file !== file) : []
                 };
             });
             
@@ -72,9 +75,29 @@ function generateEpisodeEntries() {
     }
 }
 
+// Read the sidecar podcast_creator.py writes next to each episode, if any
+function readRenditions(publicDir, date) {
+    const sidecarPath = path.join(publicDir, `${date}.renditions.json`);
+    if (!fs.existsSync(sidecarPath)) {
+        return null;
+    }
+    try {
+        return JSON.parse(fs.readFileSync(sidecarPath, 'utf-8'));
+    } catch (error) {
+        console.error('Error reading renditions sidecar:', sidecarPath, error.message);
+        return null;
+    }
+}
+
+function formatDuration(seconds) {
+    const total = Math.round(seconds);
+    const pad = value => String(value).padStart(2, '0');
+    return `${pad(Math.floor(total / 3600))}:${pad(Math.floor(total / 60) % 60)}:${pad(total % 60)}`;
+}
+
 function generatePodcastFeed(episodes) {
     const feed = `<?xml version="1.0" encoding="UTF-8"?>
-<rss xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd">
+<rss xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd" xmlns:podcast="https://podcastindex.org/namespace/1.0">
   <channel>
     <title>Mzansi Lowdown: South African Daily News</title>
     <link>${baseUrl}</link>
@@ -102,7 +125,10 @@ function generatePodcastFeed(episodes) {
         url="${baseUrl}/${episode.filename}"
         type="audio/mpeg"
         length="${episode.length}"
-      />
+      />${episode.alternates.map(alternate => `
+      <podcast:alternateEnclosure type="${alternate.mime_type}" length="${alternate.size}" bitrate="${alternate.bitrate}">
+        <podcast:source uri="${baseUrl}/${alternate.file}" />
+      </podcast:alternateEnclosure>`).join('')}
     </item>`).join('\n    ')}
   </channel>
 </rss>`;
@@ -1,14 +1,62 @@
+import asyncio
 import os
 import time
 import re
 import tempfile
 import requests
 from datetime import datetime
+from pathlib import Path
 import json
 import html
 import io
 import wave
-from scripts.secure_secrets import get_azure_speech_key, get_azure_speech_region
+from concurrent.futures import ThreadPoolExecutor
+from scripts.audio_engine import (
+    TARGET_CHANNELS, TARGET_SAMPLE_RATE, find_silent_gaps, iter_wav_pcm, mix_segments, open_wav_writer
+)
+from scripts.azure_tts import (
+    SECTION_BREAK_MS, TTSRequestError, parse_bookmark_offsets, section_separator
+)
+from scripts.azure_tts_async import AsyncAzureTTSClient
+from scripts.chunk_planner import plan_episode
+from scripts.episode_manifest import EpisodeManifest, EpisodeRecorder, episode_dir, manifest_path_for
+from scripts.ffmpeg_runner import FFmpegError, ffmpeg
+from scripts.music_cache import MusicAssetCache
+from scripts.renditions import PRIMARY_RENDITION, encode_args, renditions_from_env, write_sidecar
+from scripts.scratch import ScratchSpace, new_scratch_file
+from scripts.tts_endpoint_pool import AsyncAzureTTSPool, AzureTTSPool
+from scripts.tts_cache import TTSCache
+from scripts.tts_scheduler import AsyncTTSScheduler, ResultBoard, TTSScheduler
+
+# Upper bound on TTS requests in flight (override with TTS_MAX_WORKERS); the
+# scheduler starts at half of this and adapts to Azure throttling
+DEFAULT_TTS_WORKERS = 8
+
+# Single-character normalization for speech synthesis: dashes and ellipses are
+# spelled out in ASCII, apostrophes and accents are dropped entirely, and
+# newlines become spaces to prevent pauses
+SANITIZE_TABLE = str.maketrans({
+    '—': '-', '–': '-', '…': '...',
+    "'": None, '`': None, '´': None,
+    '\n': ' ',
+})
+
+# Music markers are protected while apostrophes are removed, then restored
+MUSIC_MARKER_PATTERN = re.compile(r'\*\*([^*]+)\*\*')
+PROTECTED_MARKER_PATTERN = re.compile(r'__MUSIC_MARKER_([^_]+)__')
+
+# word space-s -> words (anchored at word starts to avoid rescanning inside words)
+STRAY_S_PATTERN = re.compile(r'\b(\w+)\s+s\b')
+
+NON_ASCII_PATTERN = re.compile(r'[^\x00-\x7F]+')
+
+SPEAKER_PATTERN = re.compile(r'\*\*Leah:\*\*\s*|\bLeah:\s*')
+SOUND_EFFECT_MARKERS = ('**Intro music**', '**Transition music**', '**Outro music**')
+BLANK_LINES_PATTERN = re.compile(r'\n{3,}')
+SPACES_PATTERN = re.compile(r' {2,}')
+
+# Music cues recognized by extract_sections, in order of precedence
+MUSIC_CUES = (('**intro music**', 'intro'), ('**transition music**', 'transition'), ('**outro music**', 'outro'))
 
 def sanitize_text(text):
     """
@@ -21,40 +69,27 @@ def sanitize_text(text):
     Returns:
         str: Sanitized text
     """
-    # Sanitize text for speech synthesis
+    # Protect music markers while apostrophes are removed
+    if '**' in text:
+        text = MUSIC_MARKER_PATTERN.sub(r'__MUSIC_MARKER_\1__', text)
     
-    # Replace problematic characters, curly quotes with straight quotes
-    text = text.replace('"', '"').replace('"', '"')
-    text = text.replace(''', "'").replace(''', "'")
-    text = text.replace('—', '-').replace('–', '-')
-    text = text.replace('…', '...')
-    
-    # Handle different types of apostrophes for TTS
-    # First, protect music markers
-    import re
-    text = re.sub(r'\*\*([^*]+)\*\*', r'__MUSIC_MARKER_\1__', text)
-    
-    # Remove all types of apostrophes completely (no replacement)
-    text = text.replace("'", "")  # Regular apostrophe
-    text = text.replace("'", "")  # Smart quote left
-    text = text.replace("'", "")  # Smart quote right
-    text = text.replace("`", "")  # Grave accent
-    text = text.replace("´", "")  # Acute accent
+    # Replace dashes, ellipses and newlines, remove all types of apostrophes (no replacement)
+    text = text.translate(SANITIZE_TABLE)
     
     # Restore music markers
-    text = re.sub(r'__MUSIC_MARKER_([^_]+)__', r'**\1**', text)
+    if '__MUSIC_MARKER_' in text:
+        text = PROTECTED_MARKER_PATTERN.sub(r'**\1**', text)
     
     # Append stray 's' characters to the preceding word
-    text = re.sub(r'(\w+)\s+s\b', r'\1s', text)  # word space-s -> words
+    text = STRAY_S_PATTERN.sub(r'\1s', text)
     
     # Replace emojis and other special characters
-    text = re.sub(r'[^\x00-\x7F]+', ' ', text)
-    
-    # Replace newlines with spaces to prevent pauses
-    text = re.sub(r'\n+', ' ', text)
+    if not text.isascii():
+        text = NON_ASCII_PATTERN.sub(' ', text)
     
     # Remove extra spaces
-    text = re.sub(r' {2,}', ' ', text)
+    if '  ' in text:
+        text = SPACES_PATTERN.sub(' ', text)
     
     return text.strip()
 
@@ -70,16 +105,19 @@ def filter_sound_effects(text):
         str: Text with sound effects and speaker markers removed but content preserved
     """
     # Remove Leah: markers (with or without asterisks)
-    text = re.sub(r'\*\*Leah:\*\*\s*|\bLeah:\s*', '', text)
+    if 'Leah:' in text:
+        text = SPEAKER_PATTERN.sub('', text)
     
     # Remove music markers explicitly
-    text = text.replace("**Intro music**", "")
-    text = text.replace("**Transition music**", "")
-    text = text.replace("**Outro music**", "")
+    if '**' in text:
+        for marker in SOUND_EFFECT_MARKERS:
+            text = text.replace(marker, '')
     
     # Clean up multiple newlines and spaces
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    text = re.sub(r' {2,}', ' ', text)
+    if '\n\n\n' in text:
+        text = BLANK_LINES_PATTERN.sub('\n\n', text)
+    if '  ' in text:
+        text = SPACES_PATTERN.sub(' ', text)
     
     return text.strip()
 
@@ -96,62 +134,112 @@ def extract_sections(text):
     sections = []
     current_text = []
     
+    def flush_text():
+        # Filter the accumulated text before adding
+        if current_text:
+            clean_text = filter_sound_effects('\n'.join(current_text))
+            if clean_text:
+                sections.append((clean_text, None))
+            current_text.clear()
+    
     for line in text.split('\n'):
-        # Check for music marker matches (case-insensitive)
-        line_lower = line.lower()
-        if '**intro music**' in line_lower:
-            if current_text:
-                # Filter the accumulated text before adding
-                clean_text = filter_sound_effects('\n'.join(current_text))
-                if clean_text:
-                    sections.append((clean_text, None))
-                current_text = []
-            sections.append((None, 'intro'))
-        elif '**transition music**' in line_lower:
-            if current_text:
-                clean_text = filter_sound_effects('\n'.join(current_text))
-                if clean_text:
-                    sections.append((clean_text, None))
-                current_text = []
-            sections.append((None, 'transition'))
-        elif '**outro music**' in line_lower:
-            if current_text:
-                clean_text = filter_sound_effects('\n'.join(current_text))
-                if clean_text:
-                    sections.append((clean_text, None))
-                current_text = []
-            sections.append((None, 'outro'))
+        # Check for music marker matches (case-insensitive); only lines with
+        # asterisks can hold one
+        music_type = None
+        if '**' in line:
+            line_lower = line.lower()
+            music_type = next((music for cue, music in MUSIC_CUES if cue in line_lower), None)
+        
+        if music_type:
+            flush_text()
+            sections.append((None, music_type))
         else:
             current_text.append(line)
     
     # Don't forget any remaining text
-    if current_text:
-        clean_text = filter_sound_effects('\n'.join(current_text))
-        if clean_text:
-            sections.append((clean_text, None))
+    flush_text()
+    
+    return sections
+
+def lookup_tts_cache(cache, text, client, output_file):
+    """
+    Look up synthesized audio for text in the TTS cache
     
-    return [(text, music) for text, music in sections if text or music]
+    Args:
+        cache (TTSCache): Audio cache, or None
+        text (str or list): The text (or list of batched section texts) to speak
+        client: TTS client whose voice settings are part of the key
+        output_file (str): Where to copy the cached audio
+        
+    Returns:
+        tuple: (cache key or None if there is no cache, whether it was a hit)
+    """
+    if cache is None:
+        return None, False
+    key_text = text if isinstance(text, str) else client.build_ssml(text)
+    cache_key = cache.key_for(key_text, client.voice, client.prosody_rate, client.output_format)
+    return cache_key, cache.get(cache_key, output_file)
+
+def store_in_tts_cache(cache, cache_key, audio_file):
+    """Store freshly synthesized audio in the TTS cache (a cache failure is only a warning)"""
+    if cache_key is None:
+        return
+    try:
+        cache.put(cache_key, audio_file)
+    except Exception as e:
+        print(f"Warning: Failed to store audio in TTS cache: {e}")
 
-def text_to_speech_rest(text, output_file=None):
+def synthesize_to_file(text, output_file, client, cache=None):
+    """
+    Synthesize text into output_file, raising on failure
+    
+    Args:
+        text (str): The (sanitized) text to convert to speech
+        output_file (str): Path to save the audio file
+        client (AzureTTSPool): Shared TTS client
+        cache (TTSCache, optional): Audio cache consulted before calling the API
+        
+    Raises:
+        TTSRequestError: If the API answered with an error status
+    """
+    cache_key, hit = lookup_tts_cache(cache, text, client, output_file)
+    if hit:
+        print(f"TTS cache hit. Audio saved to {output_file}")
+        return
+    
+    try:
+        # Make synthesis request (token is cached on the client) and stream
+        # the audio to disk as it arrives
+        with open(output_file, 'wb') as f:
+            response = client.stream_to(text, f)
+        if response.status_code != 200:
+            raise TTSRequestError(response)
+    except Exception:
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        raise
+    
+    print(f"Speech synthesis successful. Audio saved to {output_file}")
+    store_in_tts_cache(cache, cache_key, output_file)
+
+def text_to_speech_rest(text, output_file=None, client=None, cache=None):
     """
     Convert text to speech using Microsoft Azure Text-to-Speech REST API
     
     Args:
         text (str): The text to convert to speech
         output_file (str, optional): Path to save the audio file. If None, will use a temporary file
+        client (AzureTTSPool, optional): Shared TTS client. If None, a one-off client is created
+        cache (TTSCache, optional): Audio cache consulted before calling the API
         
     Returns:
         str: Path to the generated audio file
     """
-    # Get Azure credentials from environment variables
-    subscription_key = get_azure_speech_key()
-    region = get_azure_speech_region()
-    
-    if not subscription_key:
-        print("Error: Azure Speech key not found in secrets file")
-        return None
-    
-    print(f"Using Azure Speech region: {region}")
+    owns_client = client is None
+    if owns_client:
+        client = AzureTTSPool.from_secrets()
+        if client is None:
+            return None
     
     # If no output file specified, create a temporary one
     if output_file is None:
@@ -160,53 +248,18 @@ def text_to_speech_rest(text, output_file=None):
         temp_file.close()
     
     try:
-        # Get access token
-        token_url = f"https://{region}.api.cognitive.microsoft.com/sts/v1.0/issueToken"
-        headers = {
-            'Ocp-Apim-Subscription-Key': subscription_key
-        }
-        response = requests.post(token_url, headers=headers)
-        access_token = str(response.text)
-        
-        # Prepare synthesis request
-        url = f"https://{region}.tts.speech.microsoft.com/cognitiveservices/v1"
-        headers = {
-            'Authorization': f'Bearer {access_token}',
-            'Content-Type': 'application/ssml+xml',
-            'X-Microsoft-OutputFormat': 'riff-24khz-16bit-mono-pcm',  # WAV format
-            'User-Agent': 'SA News Podcast'
-        }
-        
-        # Create SSML with normal speed (1.0x)
-        ssml = f"""
-        <speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="en-ZA">
-            <voice name="en-ZA-LeahNeural">
-                <prosody rate="1.0">
-                    {text}
-                </prosody>
-            </voice>
-        </speak>
-        """
-        
-        # Make synthesis request
-        response = requests.post(url, headers=headers, data=ssml.encode('utf-8'))
-        
-        if response.status_code == 200:
-            # Save the audio
-            with open(output_file, 'wb') as f:
-                f.write(response.content)
-            print(f"Speech synthesis successful. Audio saved to {output_file}")
-            return output_file
-        else:
-            print(f"Error: Speech synthesis failed with status code {response.status_code}")
-            print(f"Response: {response.text}")
-            return None
-            
+        synthesize_to_file(text, output_file, client, cache)
+        return output_file
+    except TTSRequestError as e:
+        print(f"Error: Speech synthesis failed with status code {e.status_code}")
+        print(f"Response: {e.response_text}")
+        return None
     except Exception as e:
         print(f"Error during text-to-speech conversion: {e}")
-        if os.path.exists(output_file):
-            os.remove(output_file)
         return None
+    finally:
+        if owns_client:
+            client.close()
 
 def convert_audio_ffmpeg(input_file, output_file, input_format='wav', output_format='mp3'):
     """
@@ -225,23 +278,18 @@ def convert_audio_ffmpeg(input_file, output_file, input_format='wav', output_for
         print(f"Converting {input_file} to {output_format}")
         
         # Use ffmpeg to convert the file
-        # -y: Overwrite output file if it exists
         # -i: Input file
         # -acodec: Audio codec (libmp3lame for MP3)
         # -ab: Audio bitrate (192k for good quality)
         # -ar: Audio sample rate (44100 Hz is standard)
-        command = f'ffmpeg -y -i "{input_file}" -acodec libmp3lame -ab 192k -ar 44100 "{output_file}"'
-        
-        # Run the command
-        result = os.system(command)
-        
-        if result == 0:
-            print(f"Audio conversion successful. Saved to {output_file}")
-            return True
-        else:
-            print(f"Error: ffmpeg conversion failed with exit code {result}")
-            return False
-            
+        ffmpeg.run(['-i', input_file, '-acodec', 'libmp3lame', '-ab', '192k', '-ar', '44100', output_file],
+                   label='convert')
+        print(f"Audio conversion successful. Saved to {output_file}")
+        return True
+    
+    except FFmpegError as e:
+        print(f"Error: {e}")
+        return False
     except Exception as e:
         print(f"Error converting audio: {e}")
         return False
@@ -275,31 +323,144 @@ def normalize_wav_file(input_file, output_file=None):
             temp.close()
             
         # Convert to standard format (44.1kHz stereo)
-        command = f'ffmpeg -y -i "{input_file}" -acodec pcm_s16le -ac 2 -ar 44100 "{output_file}"'
-        result = os.system(command)
-        
-        if result == 0:
-            print(f"Normalized audio file: {output_file}")
-            return output_file
-        else:
-            print(f"Error: Failed to normalize audio file")
-            if os.path.exists(output_file):
-                os.remove(output_file)
-            return None
-            
+        ffmpeg.run(['-i', input_file, '-acodec', 'pcm_s16le', '-ac', '2', '-ar', '44100', output_file],
+                   label='normalize')
+        print(f"Normalized audio file: {output_file}")
+        return output_file
+    
+    except FFmpegError as e:
+        print(f"Error: Failed to normalize audio file: {e}")
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        return None
     except Exception as e:
         print(f"Error normalizing audio: {e}")
         if output_file and os.path.exists(output_file):
             os.remove(output_file)
         return None
 
-def concatenate_wav_files(file_list, output_file):
+def iter_normalized_pcm(wav_file, music_cache=None):
+    """
+    Stream a WAV file as 16-bit PCM blocks in the standard format (44.1kHz, stereo)
+    
+    Music assets are served from the pre-converted music cache, other uncompressed
+    WAVs are converted in-process, and anything the wave module cannot read is
+    decoded by ffmpeg straight into a pipe.
+    
+    Args:
+        wav_file (str): Path to the WAV file
+        music_cache (MusicAssetCache, optional): Cache of pre-converted music beds
+        
+    Yields:
+        bytes: Normalized PCM frames
+    """
+    if music_cache is not None and music_cache.has(wav_file):
+        yield music_cache.get_pcm(wav_file)
+        return
+    
+    try:
+        with wave.open(wav_file, 'rb') as reader:
+            readable = reader.getnchannels() in (1, 2)
+    except (wave.Error, EOFError):
+        readable = False
+    
+    if readable:
+        yield from iter_wav_pcm(wav_file)
+        return
+    
+    print(f"Normalizing {wav_file} with ffmpeg")
+    frame_size = TARGET_CHANNELS * 2
+    pending = b''
+    for block in ffmpeg.read(['-i', wav_file, '-f', 's16le', '-acodec', 'pcm_s16le', '-ac', str(TARGET_CHANNELS),
+                              '-ar', str(TARGET_SAMPLE_RATE), 'pipe:1'], label='normalize'):
+        # Pipe reads can end mid-frame; hold the partial frame back for the next block
+        pending += block
+        whole = len(pending) - len(pending) % frame_size
+        if whole:
+            yield pending[:whole]
+            pending = pending[whole:]
+
+def iter_episode_pcm(file_list, music_cache=None):
+    """
+    Stream the normalized PCM of several WAV files back to back
+    
+    Args:
+        file_list (list): List of WAV file paths, in playback order
+        music_cache (MusicAssetCache, optional): Cache of pre-converted music beds
+        
+    Yields:
+        bytes: Normalized PCM frames
+    """
+    for i, wav_file in enumerate(file_list):
+        print(f"Adding file {i+1}/{len(file_list)}: {wav_file}")
+        yield from iter_normalized_pcm(wav_file, music_cache)
+
+def encode_pcm_to_mp3(pcm_blocks, output_file, sample_rate=TARGET_SAMPLE_RATE, channels=TARGET_CHANNELS,
+                      renditions=()):
+    """
+    Encode a stream of 16-bit PCM blocks to MP3 with a single ffmpeg process
+    
+    The PCM is piped into ffmpeg's stdin, so no combined WAV is written. Extra
+    renditions (e.g. a low-bitrate MP3 and Opus) are further outputs of the same
+    ffmpeg process, so the audio is assembled and decoded only once. Every file
+    is written next to its final path and moved into place once encoding succeeds,
+    then a sidecar listing each rendition's size and the episode's duration is
+    written next to output_file.
+    
+    Args:
+        pcm_blocks (iterable): Raw 16-bit little-endian PCM blocks
+        output_file (str): Path to save the MP3 file
+        sample_rate (int): Sample rate of the PCM stream
+        channels (int): Channel count of the PCM stream
+        renditions (list): Extra Rendition objects to encode (see scripts/renditions.py)
+    
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    outputs = [(PRIMARY_RENDITION, output_file)] + [(r, r.path_for(output_file)) for r in renditions]
+    partial_files = [f"{path}.part" for _, path in outputs]
+    args = encode_args([(rendition, partial) for (rendition, _), partial in zip(outputs, partial_files)],
+                       sample_rate, channels)
+    pcm_bytes = 0
+    
+    def counted(blocks):
+        nonlocal pcm_bytes
+        for block in blocks:
+            pcm_bytes += len(block)
+            yield block
+    
+    try:
+        print(f"Streaming audio into MP3 encoder: {', '.join(path for _, path in outputs)}")
+        ffmpeg.feed(args, counted(pcm_blocks), label='encode')
+        for (_, path), partial_file in zip(outputs, partial_files):
+            os.replace(partial_file, path)
+        print(f"Audio encoding successful. Saved to {output_file}")
+        duration = pcm_bytes / (sample_rate * channels * 2)
+        print(f"Rendition sidecar written to {write_sidecar(output_file, outputs, duration)}")
+        return True
+    
+    except FFmpegError as e:
+        print(f"Error: {e}")
+        return False
+    except Exception as e:
+        print(f"Error encoding audio: {e}")
+        return False
+    finally:
+        for partial_file in partial_files:
+            if os.path.exists(partial_file):
+                os.remove(partial_file)
+
+def concatenate_wav_files(file_list, output_file, music_cache=None):
     """
     Concatenate multiple WAV files into a single WAV file
     
+    Each segment is converted to the standard format (44.1kHz, stereo) in-process
+    and streamed straight into the output file.
+    
     Args:
         file_list (list): List of WAV file paths
         output_file (str): Path to save the combined WAV file
+        music_cache (MusicAssetCache, optional): Cache of pre-converted music beds
     
     Returns:
         bool: True if successful, False otherwise
@@ -307,62 +468,391 @@ def concatenate_wav_files(file_list, output_file):
     try:
         print(f"Concatenating {len(file_list)} WAV files to {output_file}")
         
-        # Create a temporary directory for normalized files
-        temp_dir = tempfile.mkdtemp()
-        normalized_files = []
-        
-        # Normalize each file to standard format
-        for i, wav_file in enumerate(file_list):
-            print(f"Normalizing file {i+1}/{len(file_list)}: {wav_file}")
-            normalized_file = os.path.join(temp_dir, f"normalized_{i}.wav")
-            result = normalize_wav_file(wav_file, normalized_file)
-            if result:
-                normalized_files.append(normalized_file)
-            else:
-                print(f"Error: Failed to normalize {wav_file}")
-                # Clean up
-                for f in normalized_files:
-                    if os.path.exists(f):
-                        os.remove(f)
-                os.rmdir(temp_dir)
-                return False
+        with open_wav_writer(output_file) as writer:
+            for block in iter_episode_pcm(file_list, music_cache):
+                writer.writeframesraw(block)
         
-        # Create a file list for ffmpeg
-        list_file = os.path.join(temp_dir, "files.txt")
-        with open(list_file, 'w') as f:
-            for file in normalized_files:
-                f.write(f"file '{file}'\n")
-        
-        # Use ffmpeg to concatenate all files
-        command = f'ffmpeg -y -f concat -safe 0 -i "{list_file}" -c copy "{output_file}"'
-        result = os.system(command)
-        
-        # Clean up temporary files
-        for f in normalized_files:
-            if os.path.exists(f):
-                os.remove(f)
-        if os.path.exists(list_file):
-            os.remove(list_file)
-        os.rmdir(temp_dir)
-        
-        if result == 0:
-            print(f"Successfully created concatenated WAV file: {output_file}")
-            return True
-        else:
-            print(f"Error: Failed to concatenate WAV files")
-            return False
+        print(f"Successfully created concatenated WAV file: {output_file}")
+        return True
             
     except Exception as e:
         print(f"Error concatenating WAV files: {e}")
         return False
 
-def create_podcast_with_music(transcript_file, output_file=None):
+def split_batched_audio(batch_file, section_count, bookmark_offsets=None, scratch=None):
+    """
+    Cut the audio of a batched multi-section request into one WAV file per section
+    
+    Cuts at the bookmark offsets when the server reported them; otherwise at the
+    pauses inserted after each bookmark, found by silence detection.
+    
+    Args:
+        batch_file (str): Path to the WAV audio of the whole request
+        section_count (int): Number of sections in the request
+        bookmark_offsets (list, optional): Bookmark offsets in milliseconds
+        scratch (ScratchSpace, optional): Where to write the section files
+        
+    Returns:
+        list: Paths to one temporary WAV file per section, or None if the
+            section boundaries could not be found
+    """
+    with wave.open(batch_file, 'rb') as reader:
+        params = reader.getparams()
+        data = reader.readframes(params.nframes)
+    frame_size = params.sampwidth * params.nchannels
+    frame_count = len(data) // frame_size
+    break_frames = params.framerate * SECTION_BREAK_MS // 1000
+    
+    if bookmark_offsets is not None and len(bookmark_offsets) == section_count - 1:
+        cuts = []
+        for offset_ms in bookmark_offsets:
+            start = int(offset_ms * params.framerate / 1000)
+            cuts.append((start, min(start + break_frames, frame_count)))
+    else:
+        cuts = find_silent_gaps(data, params.sampwidth, params.nchannels, params.framerate,
+                                min_gap_ms=SECTION_BREAK_MS * 4 // 5)
+        if len(cuts) != section_count - 1:
+            print(f"Warning: Found {len(cuts)} section breaks in batched audio, expected {section_count - 1}")
+            return None
+    
+    starts = [0] + [end for _, end in cuts]
+    ends = [start for start, _ in cuts] + [frame_count]
+    section_files = []
+    for start, end in zip(starts, ends):
+        section_file = new_scratch_file(scratch, '.wav')
+        with wave.open(section_file, 'wb') as writer:
+            writer.setparams(params)
+            writer.writeframes(data[start * frame_size:end * frame_size])
+        section_files.append(section_file)
+    return section_files
+
+def synthesize_sections(texts, client, cache=None, scratch=None):
+    """
+    Synthesize several text sections in one TTS request and split the audio per section
+    
+    Args:
+        texts (list): Sanitized text of each section
+        client (AzureTTSPool): Shared TTS client
+        cache (TTSCache, optional): Audio cache consulted before calling the API
+        scratch (ScratchSpace, optional): Where to write the audio files
+        
+    Returns:
+        list: Paths to one audio file per section, or None if the audio could not be split
+        
+    Raises:
+        TTSRequestError: If the API answered with an error status
+    """
+    batch_file = new_scratch_file(scratch, '.wav')
+    
+    try:
+        bookmark_offsets = None
+        cache_key, hit = lookup_tts_cache(cache, texts, client, batch_file)
+        if hit:
+            print(f"TTS cache hit for batch of {len(texts)} sections")
+        else:
+            with open(batch_file, 'wb') as f:
+                response = client.stream_to(texts, f)
+            if response.status_code != 200:
+                raise TTSRequestError(response)
+            bookmark_offsets = parse_bookmark_offsets(response)
+            store_in_tts_cache(cache, cache_key, batch_file)
+        
+        section_files = split_batched_audio(batch_file, len(texts), bookmark_offsets, scratch)
+        if section_files:
+            print(f"Batched speech synthesis successful: {len(texts)} sections in one request")
+        return section_files
+    
+    finally:
+        if os.path.exists(batch_file):
+            os.remove(batch_file)
+
+def synthesize_request(texts, client, cache=None, scratch=None):
+    """
+    Synthesize one planned TTS request
+    
+    Args:
+        texts (list): Text of each part of the request (one part, or several batched sections)
+        client (AzureTTSPool): Shared TTS client
+        cache (TTSCache, optional): Audio cache consulted before calling the API
+        scratch (ScratchSpace, optional): Where to write the audio files
+        
+    Returns:
+        list: Audio file path for each part
+        
+    Raises:
+        TTSRequestError: If the API answered with an error status
+    """
+    texts = [sanitize_text(text) for text in texts]
+    if len(texts) > 1:
+        section_files = synthesize_sections(texts, client, cache, scratch)
+        if section_files:
+            return section_files
+        print(f"Falling back to one request per section for {len(texts)} sections")
+    
+    audio_files = []
+    try:
+        for text in texts:
+            audio_files.append(new_scratch_file(scratch, '.wav'))
+            synthesize_to_file(text, audio_files[-1], client, cache)
+    except Exception:
+        for audio_file in audio_files:
+            if os.path.exists(audio_file):
+                os.remove(audio_file)
+        raise
+    return audio_files
+
+def synthesize_requests(requests, client, max_workers=None, cache=None, on_complete=None, scratch=None):
+    """
+    Synthesize planned TTS requests in parallel with adaptive concurrency
+    
+    Throttled and transient failures are retried (honoring Retry-After), and the
+    number of requests in flight adapts to how often Azure throttles.
+    
+    Args:
+        requests (list): Text parts of each request (see EpisodePlan.request_texts)
+        client (AzureTTSPool): Shared TTS client used for every request
+        max_workers (int, optional): Maximum number of concurrent TTS requests.
+            Defaults to TTS_MAX_WORKERS env var or DEFAULT_TTS_WORKERS
+        cache (TTSCache, optional): Audio cache shared by all workers
+        on_complete (callable, optional): Called as on_complete(index, files, error) as
+            soon as each request succeeds or fails for good (see ResultBoard)
+        scratch (ScratchSpace, optional): Where to write the audio files. Without one
+            they go to the system temp directory and the caller removes them
+        
+    Returns:
+        tuple: (for each request the list of part audio files, or None if it failed;
+                list of indexes of the failed requests)
+    """
+    if max_workers is None:
+        max_workers = int(os.getenv('TTS_MAX_WORKERS', DEFAULT_TTS_WORKERS))
+    max_workers = max(1, max_workers)
+    
+    print(f"\nSynthesizing {len(requests)} requests with up to {max_workers} parallel workers")
+    scheduler = TTSScheduler(max_workers)
+    if getattr(client, 'hedging', None) is not None:
+        # Hedged duplicates take their slots from the same limiter as the requests
+        client.hedging.limiter = scheduler.limiter
+    tasks = [
+        (lambda texts=texts: synthesize_request(texts, client, cache, scratch))
+        for texts in requests
+    ]
+    results, failures = scheduler.run(tasks, on_complete)
+    
+    if cache is not None:
+        cache.report()
+    client.report()
+    
+    return results, [i for i, _ in failures]
+
+async def synthesize_to_file_async(text, output_file, client, cache=None):
+    """Async variant of synthesize_to_file for AsyncAzureTTSClient"""
+    cache_key, hit = lookup_tts_cache(cache, text, client, output_file)
+    if hit:
+        print(f"TTS cache hit. Audio saved to {output_file}")
+        return
+    
+    try:
+        with open(output_file, 'wb') as f:
+            response = await client.stream_to(text, f)
+        if response.status_code != 200:
+            raise TTSRequestError(response)
+    except BaseException:
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        raise
+    
+    print(f"Speech synthesis successful. Audio saved to {output_file}")
+    store_in_tts_cache(cache, cache_key, output_file)
+
+async def synthesize_sections_async(texts, client, cache=None, scratch=None):
+    """Async variant of synthesize_sections for AsyncAzureTTSClient"""
+    batch_file = new_scratch_file(scratch, '.wav')
+    
+    try:
+        bookmark_offsets = None
+        cache_key, hit = lookup_tts_cache(cache, texts, client, batch_file)
+        if hit:
+            print(f"TTS cache hit for batch of {len(texts)} sections")
+        else:
+            with open(batch_file, 'wb') as f:
+                response = await client.stream_to(texts, f)
+            if response.status_code != 200:
+                raise TTSRequestError(response)
+            bookmark_offsets = parse_bookmark_offsets(response)
+            store_in_tts_cache(cache, cache_key, batch_file)
+        
+        # Splitting scans the whole batch for silence, so keep it off the event loop
+        section_files = await asyncio.to_thread(split_batched_audio, batch_file, len(texts), bookmark_offsets,
+                                                scratch)
+        if section_files:
+            print(f"Batched speech synthesis successful: {len(texts)} sections in one request")
+        return section_files
+    
+    finally:
+        if os.path.exists(batch_file):
+            os.remove(batch_file)
+
+async def synthesize_request_async(texts, client, cache=None, scratch=None):
+    """Async variant of synthesize_request for AsyncAzureTTSClient"""
+    texts = [sanitize_text(text) for text in texts]
+    if len(texts) > 1:
+        section_files = await synthesize_sections_async(texts, client, cache, scratch)
+        if section_files:
+            return section_files
+        print(f"Falling back to one request per section for {len(texts)} sections")
+    
+    audio_files = []
+    try:
+        for text in texts:
+            audio_files.append(new_scratch_file(scratch, '.wav'))
+            await synthesize_to_file_async(text, audio_files[-1], client, cache)
+    except BaseException:
+        for audio_file in audio_files:
+            if os.path.exists(audio_file):
+                os.remove(audio_file)
+        raise
+    return audio_files
+
+def synthesize_requests_async(requests, client, max_workers=None, cache=None, on_complete=None,
+                              scratch=None):
+    """
+    Synthesize planned TTS requests on one asyncio event loop
+    
+    Same contract as synthesize_requests, but every request (and the token fetch)
+    runs as a coroutine over one pooled httpx.AsyncClient, so hundreds of requests
+    can be in flight without a thread each.
+    
+    Args:
+        requests (list): Text parts of each request (see EpisodePlan.request_texts)
+        client (AzureTTSPool): Client whose credentials and voice settings are used
+        max_workers (int, optional): Maximum number of concurrent TTS requests.
+            Defaults to TTS_MAX_WORKERS env var or DEFAULT_TTS_WORKERS
+        cache (TTSCache, optional): Audio cache shared by all requests
+        on_complete (callable, optional): Called as on_complete(index, files, error) as
+            soon as each request succeeds or fails for good (see ResultBoard)
+        scratch (ScratchSpace, optional): Where to write the audio files. Without one
+            they go to the system temp directory and the caller removes them
+        
+    Returns:
+        tuple: (for each request the list of part audio files, or None if it failed;
+                list of indexes of the failed requests)
+    """
+    if max_workers is None:
+        max_workers = int(os.getenv('TTS_MAX_WORKERS', DEFAULT_TTS_WORKERS))
+    max_workers = max(1, max_workers)
+    
+    async def run():
+        async_type = AsyncAzureTTSPool if isinstance(client, AzureTTSPool) else AsyncAzureTTSClient
+        async with async_type.from_client(client, pool_size=max_workers) as async_client:
+            tasks = [
+                (lambda texts=texts: synthesize_request_async(texts, async_client, cache, scratch))
+                for texts in requests
+            ]
+            scheduler = AsyncTTSScheduler(max_workers)
+            if async_client.hedging is not None:
+                async_client.hedging.limiter = scheduler.limiter
+            return await scheduler.run_async(tasks, on_complete)
+    
+    print(f"\nSynthesizing {len(requests)} requests with up to {max_workers} concurrent requests (asyncio)")
+    results, failures = asyncio.run(run())
+    
+    if cache is not None:
+        cache.report()
+    client.report()
+    
+    return results, [i for i, _ in failures]
+
+def iter_timeline_files(timeline, plan, board):
+    """
+    Yield the audio file of every episode segment in playback order
+    
+    Args:
+        timeline (list): Music file paths and indexes of text sections, in transcript order
+        plan (EpisodePlan): The TTS request plan for the text sections
+        board (ResultBoard): Audio files of each request, posted as requests complete
+        
+    Yields:
+        str: Audio file path, as soon as it and every earlier segment are ready
+        
+    Raises:
+        Exception: The error of a TTS request that failed
+    """
+    for entry in timeline:
+        if isinstance(entry, int):
+            for request_index, part_index in plan.section_parts(entry):
+                yield board.get(request_index)[part_index]
+        else:
+            yield entry
+
+def iter_timeline_segments(timeline, plan, board, music_cache, recorder, section_keys,
+                           previous=None, reused=None):
+    """
+    Stream the normalized PCM of every episode segment in playback order
+    
+    With a recorder, each segment is also recorded (unmixed) into the episode's PCM
+    artifact, so the next render of the episode can splice unchanged sections back in.
+    
+    Args:
+        timeline (list): Music file paths and indexes of text sections, in transcript order
+        plan (EpisodePlan): The TTS request plan for the sections being synthesized
+        board (ResultBoard): Audio files of each request, posted as requests complete
+        music_cache (MusicAssetCache): Cache of pre-converted music beds
+        recorder (EpisodeRecorder): Records the stream and the position of each segment,
+            or None to record nothing
+        section_keys (list): Text hash of each section
+        previous (EpisodeManifest, optional): Manifest of the previous render
+        reused (dict, optional): Section index -> segment of previous to reuse instead of
+            synthesized audio
+        
+    Yields:
+        iterable: Normalized PCM blocks of each segment, as soon as it and every earlier
+            segment are ready. Each segment must be consumed before the next is requested
+    """
+    reused = reused or {}
+    
+    def record(kind, pcm_blocks, **fields):
+        return recorder.record(kind, pcm_blocks, **fields) if recorder is not None else pcm_blocks
+    
+    for i, entry in enumerate(timeline):
+        if isinstance(entry, str):
+            print(f"Adding segment {i+1}/{len(timeline)}: {entry}")
+            yield record('music', iter_normalized_pcm(entry, music_cache), source=entry)
+        elif entry in reused:
+            print(f"Adding segment {i+1}/{len(timeline)}: section {entry+1} from the previous render")
+            yield record('speech', previous.iter_segment_pcm(reused[entry]),
+                                  key=section_keys[entry])
+        else:
+            files = [board.get(request_index)[part_index]
+                     for request_index, part_index in plan.section_parts(entry)]
+            print(f"Adding segment {i+1}/{len(timeline)}: section {entry+1} ({len(files)} part(s))")
+            blocks = (block for audio_file in files for block in iter_normalized_pcm(audio_file))
+            yield record('speech', blocks, key=section_keys[entry])
+
+def create_podcast_with_music(transcript_file, output_file=None, max_workers=None, stream_encode=True,
+                              batch_sections=None, tts_engine=None, incremental=None, mix_joins=True,
+                              renditions=None):
     """
     Create a podcast with text-to-speech and music in podcast-standard format
     
     Args:
         transcript_file (str): Path to the transcript file
         output_file (str): Path to save the final audio file. If None, will use current date
+        max_workers (int, optional): Maximum number of concurrent TTS requests
+        stream_encode (bool): Pipe the assembled audio straight into the MP3 encoder
+            instead of writing a combined WAV file first
+        batch_sections (bool, optional): Send several story sections per TTS request and
+            split the audio at bookmarks. Defaults to the TTS_BATCH_SECTIONS env var
+        tts_engine (str, optional): 'threads' (requests, one worker thread per request in
+            flight) or 'async' (httpx on one event loop). Defaults to the TTS_ENGINE env var
+        incremental (bool, optional): Keep the episode's raw PCM and a manifest in the local
+            episode cache, and reuse the audio of sections unchanged since the last render
+            of this episode. Only applies with stream_encode. Costs a raw PCM copy of the
+            episode on disk, so it is off unless the EPISODE_INCREMENTAL env var is '1'
+        mix_joins (bool): Trim leading/trailing silence of every segment and crossfade
+            music and speech at the joins. Only applies with stream_encode
+        renditions (list, optional): Extra Rendition objects (e.g. low-bitrate MP3, Opus)
+            encoded in the same ffmpeg run as the MP3, with a sidecar listing them. Only
+            applies with stream_encode. Defaults to the PODCAST_RENDITIONS env var
     """
     try:
         # If no output file specified, create one with today's date
@@ -370,9 +860,6 @@ def create_podcast_with_music(transcript_file, output_file=None):
             current_date = datetime.now().strftime('%Y-%m-%d')
             output_file = f"public/{current_date}.mp3"
         
-        # Create a temporary WAV file for the combined audio
-        temp_wav_file = tempfile.NamedTemporaryFile(suffix='.wav', delete=False).name
-        
         # Read the transcript file
         with open(transcript_file, 'r', encoding='utf-8') as f:
             text = f.read()
@@ -393,8 +880,10 @@ def create_podcast_with_music(transcript_file, output_file=None):
                 print(f"Error: Music file {music_file} not found")
                 return False
         
-        # Process each section and collect WAV files
-        audio_files = []
+        # Build the episode timeline: music file paths and indexes into the
+        # list of text sections, in transcript order
+        timeline = []
+        section_texts = []
         intro_played = False
         
         for i, (section_text, music_type) in enumerate(sections):
@@ -405,80 +894,143 @@ def create_podcast_with_music(transcript_file, output_file=None):
                 # Add appropriate music
                 if music_type == "intro":
                     if not intro_played:
-                        audio_files.append(intro_music_path)
+                        timeline.append(intro_music_path)
                         intro_played = True
                     else:
                         print("Skipping duplicate intro music")
                 elif music_type == "transition":
-                    audio_files.append(transition_music_path)
+                    timeline.append(transition_music_path)
                 elif music_type == "outro":
-                    audio_files.append(outro_music_path)
+                    timeline.append(outro_music_path)
             
             elif section_text:
                 # If this is the first section and we haven't played intro yet, play it
                 if i == 0 and not intro_played:
                     print("Adding initial intro music")
-                    audio_files.append(intro_music_path)
+                    timeline.append(intro_music_path)
                     intro_played = True
                 
-                print(f"Converting text section of length {len(section_text)}")
-                
-                # Simple splitting for TTS - keep chunks manageable
-                max_chunk_len = 4500  # Adjust if needed
-                chunks = []
-                current_pos = 0
-                while current_pos < len(section_text):
-                    end_pos = min(current_pos + max_chunk_len, len(section_text))
-                    # Try to find a sentence break near the end
-                    sentence_break = section_text.rfind('.', current_pos, end_pos)
-                    if sentence_break != -1 and end_pos < len(section_text):
-                        end_pos = sentence_break + 1
-                    
-                    chunks.append(section_text[current_pos:end_pos])
-                    current_pos = end_pos
-                    
-                print(f"Split into {len(chunks)} chunks for TTS")
-                
-                for j, chunk in enumerate(chunks):
-                    if not chunk.strip(): # Skip empty chunks
-                        continue
-                    print(f"\nProcessing chunk {j+1}/{len(chunks)}")
-                    audio_file = text_to_speech_rest(sanitize_text(chunk))
-                    if audio_file:
-                        audio_files.append(audio_file)
-                    else:
-                        print("Warning: Failed to generate audio for chunk")
+                print(f"Adding text section of length {len(section_text)}")
+                timeline.append(len(section_texts))
+                section_texts.append(section_text)
         
-        # Check if we have any audio content
-        if not audio_files:
-            print("Error: No audio content was generated")
+        client = AzureTTSPool.from_secrets()
+        if client is None:
             return False
         
-        # Concatenate all WAV files
-        print(f"\nConcatenating {len(audio_files)} audio segments")
-        if not concatenate_wav_files(audio_files, temp_wav_file):
-            print("Error: Failed to concatenate audio files")
-            return False
+        # Pack the text into as few TTS requests as Azure's limits allow
+        if batch_sections is None:
+            batch_sections = os.getenv('TTS_BATCH_SECTIONS', '').lower() in ('1', 'true', 'yes')
+        
+        # Sections whose text and voice are unchanged since the last render of this
+        # episode are spliced in from its PCM artifact instead of being synthesized
+        if incremental is None:
+            incremental = os.getenv('EPISODE_INCREMENTAL', '').lower() in ('1', 'true', 'yes')
+        section_keys = [TTSCache.key_for(sanitize_text(text), client.voice, client.prosody_rate,
+                                         client.output_format) for text in section_texts]
+        manifest_file = manifest_path_for(output_file)
+        previous = EpisodeManifest.load(manifest_file) if stream_encode and incremental else None
+        reused = {}
+        if previous is not None:
+            for i, key in enumerate(section_keys):
+                segment = previous.find(key)
+                if segment is not None:
+                    reused[i] = segment
+            print(f"Reusing {len(reused)} of {len(section_texts)} text sections from {manifest_file}")
         
-        # Convert the final WAV file to MP3 using ffmpeg
-        print(f"\nConverting final WAV file to MP3: {output_file}")
-        if not convert_audio_ffmpeg(temp_wav_file, output_file, 'wav', 'mp3'):
-            print("Error: Failed to convert to MP3")
+        # Sections left empty get no requests in the plan
+        plan = plan_episode(['' if i in reused else text for i, text in enumerate(section_texts)],
+                            client.envelope_bytes(), batch_sections=batch_sections,
+                            separator_bytes=len(section_separator(len(section_texts))))
+        plan.report()
+        
+        # Check if we have any audio content
+        if not timeline:
+            print("Error: No audio content was generated")
             return False
         
-        print(f"Podcast created successfully: {output_file}")
+        cache = TTSCache()
+        if tts_engine is None:
+            tts_engine = os.getenv('TTS_ENGINE', 'threads').lower()
+        synthesize = synthesize_requests_async if tts_engine == 'async' else synthesize_requests
         
-        # Clean up temporary files
+        # Synthesize all requests in parallel over one pooled client on a background
+        # thread; each request's audio is posted to the board as soon as it is ready
+        # Every intermediate file lives in one scratch space (RAM-backed when possible),
+        # removed when it closes; it closes last, after the synthesis thread has stopped
+        board = ResultBoard(len(plan.requests))
+        recorder = None
         try:
-            # Only clean up the temporary files we created, not the original WAV music files
-            temp_files = [f for f in audio_files if f.startswith(tempfile.gettempdir())]
-            temp_files.append(temp_wav_file)
-            for file in temp_files:
-                if os.path.exists(file):
-                    os.remove(file)
-        except Exception as e:
-            print(f"Warning: Error cleaning up temporary files: {e}")
+            with ScratchSpace() as scratch, client, ThreadPoolExecutor(max_workers=1) as executor, \
+                    MusicAssetCache([intro_music_path, transition_music_path, outro_music_path]) as music_cache:
+                synthesis = executor.submit(synthesize, plan.request_texts, client, max_workers, cache,
+                                            board.report, scratch)
+                synthesis.add_done_callback(
+                    lambda future: board.close(future.exception() or RuntimeError("TTS synthesis stopped")))
+                
+                encoded = True
+                if stream_encode:
+                    # Encode each segment as soon as it and everything before it is ready,
+                    # so the MP3 encode overlaps with the remaining TTS requests
+                    print(f"\nEncoding {len(timeline)} audio segments to MP3 as they become ready: {output_file}")
+                    if incremental:
+                        recorder = EpisodeRecorder(episode_dir() / f"{Path(output_file).stem}.pcm")
+                    segments = iter_timeline_segments(timeline, plan, board, music_cache, recorder,
+                                                      section_keys, previous, reused)
+                    if mix_joins:
+                        # Trim dead air around each segment and crossfade the joins
+                        pcm_blocks = mix_segments(segments)
+                    else:
+                        pcm_blocks = (block for segment in segments for block in segment)
+                    if renditions is None:
+                        renditions = renditions_from_env()
+                    encoded = encode_pcm_to_mp3(pcm_blocks, output_file, renditions=renditions)
+                
+                _, failed_requests = synthesis.result()
+                
+                # A missing request would leave a gap in the episode, so fail clearly instead
+                if failed_requests:
+                    print(f"Error: {len(failed_requests)} of {len(plan.requests)} TTS requests failed after retries "
+                          f"(requests {', '.join(str(i + 1) for i in failed_requests)}) - not creating a podcast with gaps")
+                    return False
+                
+                if not encoded:
+                    print("Error: Failed to encode MP3")
+                    return False
+                
+                if recorder is not None:
+                    recorder.commit(manifest_file)
+                    recorder = None
+                    print(f"Episode manifest written to {manifest_file}")
+                
+                if not stream_encode:
+                    audio_files = list(iter_timeline_files(timeline, plan, board))
+                    
+                    # Create a temporary WAV file for the combined audio
+                    temp_wav_file = scratch.new_file('.wav')
+                    
+                    # Concatenate all WAV files
+                    print(f"\nConcatenating {len(audio_files)} audio segments")
+                    if not concatenate_wav_files(audio_files, temp_wav_file, music_cache):
+                        print("Error: Failed to concatenate audio files")
+                        return False
+                    
+                    # Convert the final WAV file to MP3 using ffmpeg
+                    print(f"\nConverting final WAV file to MP3: {output_file}")
+                    if not convert_audio_ffmpeg(temp_wav_file, output_file, 'wav', 'mp3'):
+                        print("Error: Failed to convert to MP3")
+                        return False
+        
+        finally:
+            # The scratch space has removed the synthesized audio; drop a partial episode artifact
+            try:
+                if recorder is not None:
+                    recorder.discard()
+            except Exception as e:
+                print(f"Warning: Error cleaning up temporary files: {e}")
+            ffmpeg.report()
         
+        print(f"Podcast created successfully: {output_file}")
         return True
     
     except Exception as e:
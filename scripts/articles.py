@@ -0,0 +1,67 @@
+# ABOUTME: Article record shared by the RSS feeds and email newsletters, with its publication time parsed once
+# ABOUTME: Dates are kept as UTC datetimes; SAST text is only produced when the prompt content is rendered
+
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import pytz
+
+SAST = pytz.timezone('Africa/Johannesburg')
+
+# Articles older than this are left out
+MAX_ARTICLE_AGE_HOURS = 24
+
+class Article:
+    """One news item (feed article or newsletter) from any source"""
+
+    __slots__ = ('source', 'title', 'link', 'description', 'body', 'published', 'publisher')
+
+    def __init__(self, source, title, published, link=None, description=None, body=None, publisher=None):
+        """
+        Args:
+            source (str): Feed or newsletter it came from, e.g. 'Daily Maverick'
+            title (str): Headline or email subject
+            published (datetime): Publication time in UTC
+            link (str, optional): URL of the article
+            description (str, optional): Summary line
+            body (str, optional): Full text (content:encoded, newsletter text)
+            publisher (str, optional): Outlet credited in the 'Source:' line, for
+                aggregated feeds where it differs from source
+        """
+        self.source = source
+        self.title = title
+        self.published = published
+        self.link = link
+        self.description = description
+        self.body = body
+        self.publisher = publisher
+
+    @property
+    def published_sast(self):
+        """Publication time as displayed in prompts, e.g. 'Mon, 14 Apr 2025 07:30 (SAST)'"""
+        return self.published.astimezone(SAST).strftime('%a, %d %b %Y %H:%M (SAST)')
+
+    def __repr__(self):
+        return f"Article({self.source!r}, {self.title!r}, {self.published.isoformat()})"
+
+def parse_published(date_str):
+    """
+    Parse an RFC 2822 date (RSS pubDate, email Date header) into a UTC datetime
+
+    Returns:
+        datetime: The date in UTC, or None if it can't be parsed
+    """
+    try:
+        dt = parsedate_to_datetime(date_str)
+    except (TypeError, ValueError) as e:
+        print(f"Error checking date: {e}")
+        print(f"Problematic date string: {date_str}")
+        return None
+    if dt.tzinfo is None:
+        # RFC 2822 '-0000': UTC, with no claim about the sender's zone
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+def hours_since(published, now=None):
+    """Hours from published (an aware datetime) to now"""
+    now = now or datetime.now(timezone.utc)
+    return (now - published).total_seconds() / 3600
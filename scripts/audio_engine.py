@@ -0,0 +1,237 @@
+# ABOUTME: In-process PCM conversion helpers for assembling podcast audio
+# ABOUTME: Resamples, remixes and streams 16-bit WAV frames without spawning ffmpeg
+
+import audioop
+import wave
+
+# Standard format every segment is converted to before concatenation
+TARGET_SAMPLE_RATE = 44100
+TARGET_CHANNELS = 2
+TARGET_SAMPLE_WIDTH = 2
+
+# Number of source frames converted per block
+BLOCK_FRAMES = 65536
+
+def convert_pcm_block(data, sample_width, channels, sample_rate, state=None,
+                      target_rate=TARGET_SAMPLE_RATE, target_channels=TARGET_CHANNELS):
+    """
+    Convert one block of PCM frames to 16-bit audio at the target rate and channel count
+
+    Args:
+        data (bytes): Raw PCM frames
+        sample_width (int): Source sample width in bytes
+        channels (int): Source channel count (1 or 2)
+        sample_rate (int): Source sample rate
+        state: Resampler state returned by the previous call for the same stream
+        target_rate (int): Output sample rate
+        target_channels (int): Output channel count (1 or 2)
+
+    Returns:
+        tuple: (converted bytes, resampler state for the next block)
+    """
+    if sample_width == 1:
+        # 8-bit WAV is unsigned
+        data = audioop.bias(data, 1, -128)
+    if sample_width != TARGET_SAMPLE_WIDTH:
+        data = audioop.lin2lin(data, sample_width, TARGET_SAMPLE_WIDTH)
+
+    # Resample with as few channels as possible: downmix first, upmix last
+    if channels == 2 and target_channels == 1:
+        data = audioop.tomono(data, TARGET_SAMPLE_WIDTH, 0.5, 0.5)
+        channels = 1
+    if sample_rate != target_rate:
+        data, state = audioop.ratecv(data, TARGET_SAMPLE_WIDTH, channels,
+                                     sample_rate, target_rate, state)
+    if channels == 1 and target_channels == 2:
+        data = audioop.tostereo(data, TARGET_SAMPLE_WIDTH, 1, 1)
+    return data, state
+
+def iter_wav_pcm(wav_file, target_rate=TARGET_SAMPLE_RATE, target_channels=TARGET_CHANNELS,
+                 block_frames=BLOCK_FRAMES):
+    """
+    Stream a PCM WAV file as blocks of frames in the target format
+
+    Args:
+        wav_file (str or file): Path or file object of an uncompressed WAV file
+        target_rate (int): Output sample rate
+        target_channels (int): Output channel count
+        block_frames (int): Number of source frames read per block
+
+    Yields:
+        bytes: Converted 16-bit PCM frames
+
+    Raises:
+        wave.Error: If the file is not an uncompressed PCM WAV that can be converted
+    """
+    with wave.open(wav_file, 'rb') as reader:
+        sample_width = reader.getsampwidth()
+        channels = reader.getnchannels()
+        sample_rate = reader.getframerate()
+        if channels not in (1, 2) or sample_width not in (1, 2, 3, 4):
+            raise wave.Error(f"Unsupported WAV layout: {channels} channels, {sample_width * 8}-bit")
+
+        state = None
+        while True:
+            data = reader.readframes(block_frames)
+            if not data:
+                break
+            converted, state = convert_pcm_block(data, sample_width, channels, sample_rate, state,
+                                                 target_rate, target_channels)
+            yield converted
+
+def open_wav_writer(output_file, sample_rate=TARGET_SAMPLE_RATE, channels=TARGET_CHANNELS):
+    """Open a WAV file for writing 16-bit frames in the given format"""
+    writer = wave.open(output_file, 'wb')
+    writer.setnchannels(channels)
+    writer.setsampwidth(TARGET_SAMPLE_WIDTH)
+    writer.setframerate(sample_rate)
+    return writer
+
+# RMS level (16-bit scale) below which audio counts as silence (about -44 dBFS)
+SILENCE_THRESHOLD = 200
+SILENCE_WINDOW_MS = 10
+
+def find_silent_gaps(data, sample_width, channels, sample_rate, min_gap_ms,
+                     threshold=SILENCE_THRESHOLD, window_ms=SILENCE_WINDOW_MS):
+    """
+    Find stretches of silence in PCM audio
+
+    Args:
+        data (bytes): Raw PCM frames
+        sample_width (int): Sample width in bytes
+        channels (int): Channel count
+        sample_rate (int): Sample rate
+        min_gap_ms (int): Shortest silence to report, in milliseconds
+        threshold (int): RMS level below which a window is silent
+        window_ms (int): Analysis window length in milliseconds
+
+    Returns:
+        list: (start_frame, end_frame) tuples of each silent stretch, in order
+    """
+    frame_size = sample_width * channels
+    window_frames = max(1, sample_rate * window_ms // 1000)
+    window_bytes = window_frames * frame_size
+    min_windows = max(1, min_gap_ms // window_ms)
+
+    gaps = []
+    run_start = None
+    window_count = len(data) // window_bytes
+    for i in range(window_count + 1):
+        silent = i < window_count and audioop.rms(
+            data[i * window_bytes:(i + 1) * window_bytes], sample_width) < threshold
+        if silent and run_start is None:
+            run_start = i
+        elif not silent and run_start is not None:
+            if i - run_start >= min_windows:
+                gaps.append((run_start * window_frames, i * window_frames))
+            run_start = None
+    return gaps
+
+# Silence kept around trimmed segments, and length of the crossfade at each join
+SILENCE_PAD_MS = 150
+CROSSFADE_MS = 250
+
+def trim_silence(data, sample_width, channels, sample_rate, pad_ms=SILENCE_PAD_MS,
+                 threshold=SILENCE_THRESHOLD, window_ms=SILENCE_WINDOW_MS):
+    """
+    Cut leading and trailing silence from PCM audio, keeping pad_ms of it on each side
+
+    Args:
+        data (bytes): Raw PCM frames
+        sample_width (int): Sample width in bytes
+        channels (int): Channel count
+        sample_rate (int): Sample rate
+        pad_ms (int): Silence to keep before the first and after the last sound
+        threshold (int): RMS level below which a window is silent
+        window_ms (int): Analysis window length in milliseconds
+
+    Returns:
+        bytes: The trimmed frames (empty if the audio is silent throughout)
+    """
+    frame_size = sample_width * channels
+    window_bytes = max(1, sample_rate * window_ms // 1000) * frame_size
+    window_count = len(data) // window_bytes
+    if window_count == 0:
+        return data
+
+    def loud(i):
+        return audioop.rms(data[i * window_bytes:(i + 1) * window_bytes], sample_width) >= threshold
+
+    first = next((i for i in range(window_count) if loud(i)), None)
+    if first is None:
+        return b''
+    last = next(i for i in reversed(range(window_count)) if loud(i))
+
+    pad_bytes = sample_rate * pad_ms // 1000 * frame_size
+    start = max(0, first * window_bytes - pad_bytes)
+    end = len(data) if last == window_count - 1 else min(len(data), (last + 1) * window_bytes + pad_bytes)
+    return data[start:end]
+
+def crossfade(tail, head, sample_width, window_ms=SILENCE_WINDOW_MS, sample_rate=TARGET_SAMPLE_RATE,
+              channels=TARGET_CHANNELS):
+    """
+    Mix the end of one segment into the start of the next with linear gain ramps
+
+    The ramps are applied window by window, so all sample math runs in audioop.
+
+    Args:
+        tail (bytes): Last frames of the outgoing segment
+        head (bytes): First frames of the incoming segment, same length as tail
+        sample_width (int): Sample width in bytes
+        window_ms (int): Length of each constant-gain step in milliseconds
+        sample_rate (int): Sample rate
+        channels (int): Channel count
+
+    Returns:
+        bytes: The overlapped frames
+    """
+    step_bytes = max(1, sample_rate * window_ms // 1000) * sample_width * channels
+    steps = max(1, -(-len(tail) // step_bytes))
+    mixed = bytearray()
+    for i in range(steps):
+        gain = (i + 0.5) / steps
+        start, end = i * step_bytes, (i + 1) * step_bytes
+        mixed += audioop.add(audioop.mul(tail[start:end], sample_width, 1 - gain),
+                             audioop.mul(head[start:end], sample_width, gain), sample_width)
+    return bytes(mixed)
+
+def mix_segments(segments, sample_rate=TARGET_SAMPLE_RATE, channels=TARGET_CHANNELS,
+                 pad_ms=SILENCE_PAD_MS, crossfade_ms=CROSSFADE_MS):
+    """
+    Join episode segments, trimming dead air and crossfading at every join
+
+    Each segment is held in memory while it is mixed, and the last crossfade_ms
+    of it is held back until the next segment arrives.
+
+    Args:
+        segments (iterable): Segments in playback order, each an iterable of 16-bit PCM
+            blocks in the given format
+        sample_rate (int): Sample rate of the PCM
+        channels (int): Channel count of the PCM
+        pad_ms (int): Silence kept around trimmed segments
+        crossfade_ms (int): Overlap between consecutive segments
+
+    Yields:
+        bytes: Mixed 16-bit PCM frames
+    """
+    frame_size = TARGET_SAMPLE_WIDTH * channels
+    fade_bytes = sample_rate * crossfade_ms // 1000 * frame_size
+    held = b''
+    for pcm_blocks in segments:
+        data = trim_silence(b''.join(pcm_blocks), TARGET_SAMPLE_WIDTH, channels, sample_rate, pad_ms)
+        if not data:
+            continue
+
+        overlap = min(len(held), len(data) // 2 // frame_size * frame_size)
+        if overlap:
+            yield held[:len(held) - overlap]
+            yield crossfade(held[len(held) - overlap:], data[:overlap], TARGET_SAMPLE_WIDTH,
+                            sample_rate=sample_rate, channels=channels)
+        elif held:
+            yield held
+
+        keep = min(fade_bytes, (len(data) - overlap) // frame_size * frame_size)
+        yield data[overlap:len(data) - keep]
+        held = data[len(data) - keep:]
+    if held:
+        yield held
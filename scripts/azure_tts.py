@@ -0,0 +1,294 @@
+# ABOUTME: Reusable Azure Text-to-Speech REST client for the podcast creator
+# ABOUTME: Pools HTTPS connections and caches the bearer token for its ~10 minute lifetime
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from xml.sax.saxutils import escape
+import requests
+from requests.adapters import HTTPAdapter
+from scripts.tts_hedging import run_hedged
+
+# Azure bearer tokens are valid for 10 minutes; refresh a little before that
+TOKEN_LIFETIME_SECONDS = 600
+TOKEN_REFRESH_MARGIN_SECONDS = 60
+
+DEFAULT_VOICE = "en-ZA-LeahNeural"
+DEFAULT_PROSODY_RATE = "1.0"
+DEFAULT_OUTPUT_FORMAT = "riff-24khz-16bit-mono-pcm"  # WAV format
+
+# Seconds to wait for Azure to accept a connection, and between bytes of its answer
+CONNECT_TIMEOUT_SECONDS = 10.0
+READ_TIMEOUT_SECONDS = 120.0
+
+# Size of the blocks read from a streamed synthesis response
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Pause inserted after each bookmark when several sections share one request
+SECTION_BREAK_MS = 1500
+
+# The REST endpoint only returns audio (bookmark events are a Speech SDK feature),
+# but a stand-in server can report bookmark offsets in milliseconds through this
+# header, e.g. "section-1=5230;section-2=11875"
+BOOKMARK_OFFSETS_HEADER = 'X-Bookmark-Offsets'
+
+class TTSRequestError(Exception):
+    """A synthesis request answered with a non-200 status"""
+
+    def __init__(self, response):
+        self.status_code = response.status_code
+        self.response_text = response.text
+        self.retry_after = retry_after_seconds(response)
+        super().__init__(f"Speech synthesis failed with status code {self.status_code}")
+
+    @property
+    def throttled(self):
+        """The service asked us to slow down"""
+        return self.status_code in (429, 503)
+
+    @property
+    def retryable(self):
+        """Retrying the same request may succeed"""
+        return self.status_code in (408, 429) or self.status_code >= 500
+
+def retry_after_seconds(response):
+    """
+    Read the Retry-After header of a response
+
+    Returns:
+        float: Seconds to wait, or None if the header is missing or invalid
+    """
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def section_separator(section_index):
+    """SSML markup placed before section section_index when sections are batched"""
+    return f'<bookmark mark="section-{section_index}"/><break time="{SECTION_BREAK_MS}ms"/>'
+
+def parse_bookmark_offsets(response):
+    """
+    Read bookmark offsets reported by the server, if any
+
+    Args:
+        response (requests.Response): A synthesis response
+
+    Returns:
+        list: Offsets in milliseconds ordered by section, or None if not reported
+    """
+    header = response.headers.get(BOOKMARK_OFFSETS_HEADER)
+    if not header:
+        return None
+    offsets = {}
+    for item in header.split(';'):
+        mark, _, offset = item.partition('=')
+        if mark.strip().startswith('section-') and offset:
+            offsets[int(mark.strip()[len('section-'):])] = float(offset)
+    return [offsets[i] for i in sorted(offsets)]
+
+def endpoint_urls(region, endpoint=None):
+    """
+    Token and synthesis URLs for a region, or for a custom base URL
+
+    Returns:
+        tuple: (token URL, synthesis URL)
+    """
+    if endpoint:
+        endpoint = endpoint.rstrip('/')
+        return f"{endpoint}/sts/v1.0/issueToken", f"{endpoint}/cognitiveservices/v1"
+    return (f"https://{region}.api.cognitive.microsoft.com/sts/v1.0/issueToken",
+            f"https://{region}.tts.speech.microsoft.com/cognitiveservices/v1")
+
+def build_ssml(text, voice=DEFAULT_VOICE, prosody_rate=DEFAULT_PROSODY_RATE):
+    """
+    Wrap text (XML-escaped) in the SSML envelope for a voice and rate
+
+    Args:
+        text (str or list): The text to speak, or a list of section texts to speak
+            in one request, separated by a bookmark and a pause
+        voice (str): Neural voice name
+        prosody_rate (str): SSML prosody rate
+
+    Returns:
+        str: The SSML document
+    """
+    if isinstance(text, str):
+        body = escape(text)
+    else:
+        body = escape(text[0]) + ''.join(
+            section_separator(i) + escape(section) for i, section in enumerate(text[1:], 1))
+    return f"""
+        <speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="en-ZA">
+            <voice name="{voice}">
+                <prosody rate="{prosody_rate}">
+                    {body}
+                </prosody>
+            </voice>
+        </speak>
+        """
+
+class AzureTTSClient:
+    """
+    Azure TTS client meant to be shared for a whole episode (and across threads)
+
+    Holds one pooled requests.Session and an in-memory access token, so each
+    synthesized chunk costs a single request on an already-open connection.
+    """
+
+    def __init__(self, subscription_key, region, voice=DEFAULT_VOICE,
+                 prosody_rate=DEFAULT_PROSODY_RATE, output_format=DEFAULT_OUTPUT_FORMAT,
+                 pool_size=16, endpoint=None, hedging=None):
+        """
+        Args:
+            subscription_key (str): Azure Speech subscription key
+            region (str): Azure region, e.g. 'southafricanorth'
+            voice (str): Neural voice name
+            prosody_rate (str): SSML prosody rate
+            output_format (str): Value for the X-Microsoft-OutputFormat header
+            pool_size (int): Maximum number of pooled connections per host
+            endpoint (str, optional): Base URL serving both the token and synthesis paths,
+                e.g. a local stand-in server. Defaults to the Azure endpoints for region
+            hedging (HedgePolicy, optional): Send a duplicate of slow stream_to() requests
+                and keep whichever answers first
+        """
+        self.subscription_key = subscription_key
+        self.region = region
+        self.voice = voice
+        self.prosody_rate = prosody_rate
+        self.output_format = output_format
+
+        self.endpoint = endpoint
+        self.pool_size = pool_size
+        self.token_url, self.synthesis_url = endpoint_urls(region, endpoint)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({'User-Agent': 'SA News Podcast'})
+
+        self._token = None
+        self._token_expires_at = 0.0
+        self._token_lock = threading.Lock()
+
+        self.hedging = hedging
+        self._hedge_executor = ThreadPoolExecutor(max_workers=pool_size) if hedging else None
+
+    def get_access_token(self, force_refresh=False):
+        """
+        Return a valid bearer token, fetching a new one only when the cached
+        token is missing or about to expire
+
+        Args:
+            force_refresh (bool): Discard the cached token and fetch a new one
+
+        Returns:
+            str: The access token
+        """
+        with self._token_lock:
+            now = time.monotonic()
+            if force_refresh or self._token is None or now >= self._token_expires_at:
+                response = self.session.post(
+                    self.token_url,
+                    headers={'Ocp-Apim-Subscription-Key': self.subscription_key},
+                    timeout=(CONNECT_TIMEOUT_SECONDS, READ_TIMEOUT_SECONDS)
+                )
+                response.raise_for_status()
+                self._token = str(response.text)
+                self._token_expires_at = now + TOKEN_LIFETIME_SECONDS - TOKEN_REFRESH_MARGIN_SECONDS
+            return self._token
+
+    def build_ssml(self, text):
+        """Build the SSML document for text with this client's voice and rate (see build_ssml)"""
+        return build_ssml(text, self.voice, self.prosody_rate)
+
+    def envelope_bytes(self):
+        """Size in bytes of the SSML envelope added around each request's text"""
+        return len(self.build_ssml('').encode('utf-8'))
+
+    def synthesize(self, text, stream=False):
+        """
+        Send one synthesis request for the given text
+
+        Args:
+            text (str or list): The (already sanitized) text to speak, or a list of sections
+            stream (bool): Leave the audio body unread so it can be consumed incrementally
+
+        Returns:
+            requests.Response: The synthesis response
+        """
+        ssml = self.build_ssml(text).encode('utf-8')
+        response = self._post_synthesis(ssml, self.get_access_token(), stream)
+        if response.status_code == 401:
+            # Token was revoked or expired early - refresh once and retry
+            response.close()
+            response = self._post_synthesis(ssml, self.get_access_token(force_refresh=True), stream)
+        return response
+
+    def stream_to(self, text, sink, chunk_size=STREAM_CHUNK_SIZE):
+        """
+        Synthesize text and write the audio to sink block by block as it arrives
+
+        Only one block of audio is held in memory at a time, whatever the
+        length of the response. With hedging, each attempt is buffered and the
+        winner's audio is copied to sink.
+
+        Args:
+            text (str or list): The (already sanitized) text to speak, or a list of sections
+            sink: Any object with a write(bytes) method - a file, buffer or PCM consumer
+            chunk_size (int): Size of the blocks read from the response
+
+        Returns:
+            requests.Response: The closed response. Audio is only written on status 200;
+                otherwise the error body is available as response.text
+        """
+        if self.hedging is not None:
+            return run_hedged(lambda attempt_sink: self._stream_once(text, attempt_sink, chunk_size),
+                              sink, self.hedging, self._hedge_executor)
+        return self._stream_once(text, sink, chunk_size)
+
+    def _stream_once(self, text, sink, chunk_size):
+        response = self.synthesize(text, stream=True)
+        with response:
+            if response.status_code == 200:
+                for block in response.iter_content(chunk_size=chunk_size):
+                    sink.write(block)
+            else:
+                response.content  # Read the (small) error body before closing
+        return response
+
+    def _post_synthesis(self, ssml, access_token, stream=False):
+        headers = {
+            'Authorization': f'Bearer {access_token}',
+            'Content-Type': 'application/ssml+xml',
+            'X-Microsoft-OutputFormat': self.output_format,
+        }
+        return self.session.post(self.synthesis_url, headers=headers, data=ssml, stream=stream,
+                                 timeout=(CONNECT_TIMEOUT_SECONDS, READ_TIMEOUT_SECONDS))
+
+    def report(self):
+        """Print hedging counters for this run, if hedging is enabled"""
+        if self.hedging is not None:
+            self.hedging.report()
+
+    def close(self):
+        """Close the pooled connections"""
+        if self._hedge_executor is not None:
+            # Losing attempts stop at their next block of audio
+            self._hedge_executor.shutdown(wait=False)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
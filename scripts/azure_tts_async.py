@@ -0,0 +1,139 @@
+# ABOUTME: asyncio variant of the Azure TTS client, built on httpx.AsyncClient
+# ABOUTME: Runs the token fetch and every synthesis request on one event loop and connection pool
+
+import asyncio
+import time
+import httpx
+from scripts.azure_tts import (
+    CONNECT_TIMEOUT_SECONDS, DEFAULT_OUTPUT_FORMAT, DEFAULT_PROSODY_RATE, DEFAULT_VOICE, READ_TIMEOUT_SECONDS,
+    STREAM_CHUNK_SIZE, TOKEN_LIFETIME_SECONDS, TOKEN_REFRESH_MARGIN_SECONDS, build_ssml, endpoint_urls
+)
+from scripts.tts_hedging import run_hedged_async
+
+class AsyncAzureTTSClient:
+    """
+    Async Azure TTS client meant to be shared by all requests of an episode
+
+    Mirrors AzureTTSClient: same voice settings and SSML, one pooled
+    httpx.AsyncClient and an in-memory bearer token.
+    """
+
+    def __init__(self, subscription_key, region, voice=DEFAULT_VOICE,
+                 prosody_rate=DEFAULT_PROSODY_RATE, output_format=DEFAULT_OUTPUT_FORMAT,
+                 pool_size=100, endpoint=None, hedging=None):
+        """
+        Args:
+            subscription_key (str): Azure Speech subscription key
+            region (str): Azure region, e.g. 'southafricanorth'
+            voice (str): Neural voice name
+            prosody_rate (str): SSML prosody rate
+            output_format (str): Value for the X-Microsoft-OutputFormat header
+            pool_size (int): Maximum number of pooled connections
+            endpoint (str, optional): Base URL serving both the token and synthesis paths
+            hedging (HedgePolicy, optional): Send a duplicate of slow requests and keep
+                whichever answers first
+        """
+        self.subscription_key = subscription_key
+        self.region = region
+        self.voice = voice
+        self.prosody_rate = prosody_rate
+        self.output_format = output_format
+        self.token_url, self.synthesis_url = endpoint_urls(region, endpoint)
+
+        self.http = httpx.AsyncClient(
+            headers={'User-Agent': 'SA News Podcast'},
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            timeout=httpx.Timeout(READ_TIMEOUT_SECONDS, connect=CONNECT_TIMEOUT_SECONDS),
+        )
+
+        self._token = None
+        self._token_expires_at = 0.0
+        self._token_lock = asyncio.Lock()
+        self.hedging = hedging
+
+    @classmethod
+    def from_client(cls, client, **kwargs):
+        """Create an async client with the same credentials and voice settings as an AzureTTSClient"""
+        kwargs.setdefault('pool_size', client.pool_size)
+        kwargs.setdefault('hedging', client.hedging)
+        return cls(client.subscription_key, client.region, voice=client.voice,
+                   prosody_rate=client.prosody_rate, output_format=client.output_format,
+                   endpoint=client.endpoint, **kwargs)
+
+    async def get_access_token(self, force_refresh=False):
+        """
+        Return a valid bearer token, fetching a new one only when the cached
+        token is missing or about to expire
+
+        Args:
+            force_refresh (bool): Discard the cached token and fetch a new one
+
+        Returns:
+            str: The access token
+        """
+        async with self._token_lock:
+            now = time.monotonic()
+            if force_refresh or self._token is None or now >= self._token_expires_at:
+                response = await self.http.post(
+                    self.token_url,
+                    headers={'Ocp-Apim-Subscription-Key': self.subscription_key}
+                )
+                response.raise_for_status()
+                self._token = response.text
+                self._token_expires_at = now + TOKEN_LIFETIME_SECONDS - TOKEN_REFRESH_MARGIN_SECONDS
+            return self._token
+
+    def build_ssml(self, text):
+        """Build the SSML document for text with this client's voice and rate (see build_ssml)"""
+        return build_ssml(text, self.voice, self.prosody_rate)
+
+    async def stream_to(self, text, sink, chunk_size=STREAM_CHUNK_SIZE):
+        """
+        Synthesize text and write the audio to sink block by block as it arrives
+
+        Args:
+            text (str or list): The (already sanitized) text to speak, or a list of sections
+            sink: Any object with a write(bytes) method
+            chunk_size (int): Size of the blocks read from the response
+
+        Returns:
+            httpx.Response: The closed response. Audio is only written on status 200;
+                otherwise the error body is available as response.text
+        """
+        ssml = self.build_ssml(text).encode('utf-8')
+        if self.hedging is not None:
+            return await run_hedged_async(lambda attempt_sink: self._stream_once(ssml, attempt_sink, chunk_size),
+                                          sink, self.hedging)
+        return await self._stream_once(ssml, sink, chunk_size)
+
+    async def _stream_once(self, ssml, sink, chunk_size):
+        response = await self._stream_synthesis(ssml, await self.get_access_token(), sink, chunk_size)
+        if response.status_code == 401:
+            # Token was revoked or expired early - refresh once and retry
+            token = await self.get_access_token(force_refresh=True)
+            response = await self._stream_synthesis(ssml, token, sink, chunk_size)
+        return response
+
+    async def _stream_synthesis(self, ssml, access_token, sink, chunk_size):
+        headers = {
+            'Authorization': f'Bearer {access_token}',
+            'Content-Type': 'application/ssml+xml',
+            'X-Microsoft-OutputFormat': self.output_format,
+        }
+        async with self.http.stream('POST', self.synthesis_url, headers=headers, content=ssml) as response:
+            if response.status_code == 200:
+                async for block in response.aiter_bytes(chunk_size):
+                    sink.write(block)
+            else:
+                await response.aread()
+        return response
+
+    async def aclose(self):
+        """Close the pooled connections"""
+        await self.http.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
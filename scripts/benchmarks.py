@@ -0,0 +1,134 @@
+# ABOUTME: Micro-benchmarks for the in-process stages of podcast creation
+# ABOUTME: Run with `python -m scripts.benchmarks [name ...]` from the repository root
+
+import argparse
+import glob
+import io
+import math
+import os
+import random
+import time
+from array import array
+from scripts.audio_engine import TARGET_CHANNELS, TARGET_SAMPLE_RATE, convert_pcm_block, mix_segments
+from scripts.azure_tts import AzureTTSClient, TTSRequestError
+from scripts.tts_hedging import HedgePolicy
+from scripts.tts_scheduler import TTSScheduler
+from scripts.tts_standin import SAMPLE_RATE as STANDIN_SAMPLE_RATE, render_ssml, start_standin_server
+
+def _best_of(repeats, function):
+    """Run function repeats times and return (best wall time in seconds, last result)"""
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def _music_bed(seconds, tail_silence_ms=250):
+    """Stereo 44.1kHz chord with a stretch of trailing silence, like the music assets"""
+    frames = int(TARGET_SAMPLE_RATE * seconds)
+    samples = array('h', (int(3000 * (math.sin(2 * math.pi * 220 * i / TARGET_SAMPLE_RATE)
+                                      + math.sin(2 * math.pi * 330 * i / TARGET_SAMPLE_RATE)))
+                          for i in range(frames)))
+    mono = samples.tobytes() + bytes(TARGET_SAMPLE_RATE * tail_silence_ms // 1000 * 2)
+    return convert_pcm_block(mono, 2, 1, TARGET_SAMPLE_RATE)[0]
+
+def _speech(seconds, padding_ms=400):
+    """Stand-in TTS audio of roughly the given length, padded with silence like Azure's output"""
+    sentence = "This is a sentence of about average length for a news story. "
+    text = sentence * max(1, int(seconds * 1000 / (len(sentence) * 65 + 300)))
+    pcm, _ = render_ssml(f'<speak xmlns="http://www.w3.org/2001/10/synthesis">{text}</speak>')
+    padding = bytes(STANDIN_SAMPLE_RATE * padding_ms // 1000 * 2)
+    return convert_pcm_block(padding + pcm + padding, 2, 1, STANDIN_SAMPLE_RATE)[0]
+
+def benchmark_mixer(minutes=5, repeats=3):
+    """Trim and crossfade a synthetic episode: intro, stories between transitions, outro"""
+    intro, transition = _music_bed(4.3), _music_bed(1.0)
+    story = _speech(40)
+    story_seconds = len(story) / (TARGET_SAMPLE_RATE * TARGET_CHANNELS * 2)
+    stories = max(1, math.ceil((minutes * 60 - 9) / (story_seconds + 1)))
+
+    segments = [intro]
+    for i in range(stories):
+        if i:
+            segments.append(transition)
+        segments.append(story)
+    segments.append(intro)
+
+    total_bytes = sum(len(segment) for segment in segments)
+    seconds, mixed = _best_of(repeats, lambda: sum(len(block) for block in mix_segments([s] for s in segments)))
+    audio_seconds = total_bytes / (TARGET_SAMPLE_RATE * TARGET_CHANNELS * 2)
+    print(f"mixer: {audio_seconds / 60:.1f} min episode ({len(segments)} segments, {total_bytes / 2**20:.0f} MB PCM) "
+          f"mixed in {seconds:.3f}s, best of {repeats} ({audio_seconds / seconds:.0f}x real time); "
+          f"trimmed {(total_bytes - mixed) / (TARGET_SAMPLE_RATE * TARGET_CHANNELS * 2):.1f}s of dead air and overlap")
+
+def benchmark_text(pattern='outputs/*.txt', scale=20, repeats=5):
+    """Split the sample transcripts into sections and sanitize them, as podcast_creator does"""
+    from podcast_creator import extract_sections, sanitize_text
+
+    def prepare(text):
+        return [sanitize_text(section) for section, _ in extract_sections(text) if section]
+
+    for path in sorted(glob.glob(pattern)):
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        # Repeat the transcript to stand in for much longer (e.g. weekly) editions
+        long_text = '\n'.join([text] * scale)
+        seconds, _ = _best_of(repeats, lambda: prepare(long_text))
+        print(f"text: {os.path.basename(path)} x{scale} ({len(long_text) / 2**20:.1f} MB) "
+              f"in {seconds * 1000:.1f}ms, best of {repeats} ({len(long_text) / 2**20 / seconds:.0f} MB/s)")
+
+def benchmark_hedging(requests=8, workers=8, slow_fraction=0.3, slow_ms=2000, latency_ms=150,
+                      hedge_rate=0.5, rounds=5):
+    """Synthesize episode-sized batches against a stand-in with slow stragglers, without and with hedging"""
+    server = start_standin_server(latency_ms=latency_ms, slow_fraction=slow_fraction, slow_ms=slow_ms)
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+    text = "A short news story read by the stand-in voice. " * 4
+
+    def run_batch(policy):
+        with AzureTTSClient('standin-key', 'standin', endpoint=endpoint, hedging=policy) as client:
+            def synthesize():
+                response = client.stream_to(text, io.BytesIO())
+                if response.status_code != 200:
+                    raise TTSRequestError(response)
+
+            scheduler = TTSScheduler(workers)
+            if policy is not None:
+                policy.limiter = scheduler.limiter
+            started = time.perf_counter()
+            scheduler.run([synthesize] * requests)
+            return time.perf_counter() - started
+
+    try:
+        for hedged in (False, True):
+            seconds = []
+            sent = won = 0
+            for seed in range(rounds):
+                random.seed(seed)  # The stand-in draws its stragglers from the same sequence in both modes
+                policy = HedgePolicy(max_hedge_rate=hedge_rate) if hedged else None
+                seconds.append(run_batch(policy))
+                if policy is not None:
+                    sent, won = sent + policy.hedges_sent, won + policy.hedges_won
+            detail = f"; {sent} hedges sent, {won} won" if hedged else ""
+            print(f"hedging: {'hedged' if hedged else 'plain'} {rounds}x{requests} requests "
+                  f"({slow_fraction:.0%} slowed by {slow_ms:g}ms), mean {sum(seconds) / rounds:.2f}s, "
+                  f"worst {max(seconds):.2f}s per batch{detail}")
+    finally:
+        server.shutdown()
+
+BENCHMARKS = {
+    'hedging': benchmark_hedging,
+    'mixer': benchmark_mixer,
+    'text': benchmark_text,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for podcast creation")
+    parser.add_argument('names', nargs='*', help=f"Benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+    for name in args.names or BENCHMARKS:
+        BENCHMARKS[name]()
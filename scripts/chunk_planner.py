@@ -0,0 +1,212 @@
+# ABOUTME: Plans how transcript text is packed into Azure TTS requests
+# ABOUTME: Packs whole sentences into the fewest requests that fit Azure's SSML size and audio length limits
+
+import re
+from xml.sax.saxutils import escape
+
+# Azure real-time synthesis limits (per request)
+MAX_SSML_BYTES = 64 * 1024
+MAX_AUDIO_SECONDS = 600
+
+# Keep clear of the hard limits
+SAFETY_MARGIN = 0.9
+
+# Deliberately slow speaking-rate estimate, so the audio length limit is never
+# exceeded (neural voices at rate 1.0 read roughly 14-16 characters per second)
+MIN_CHARS_PER_SECOND = 12
+
+# Default upper bound on sections sent in one batched request
+MAX_SECTIONS_PER_REQUEST = 8
+
+# Sentence ends: terminal punctuation, optionally followed by a closing quote/bracket
+SENTENCE_BREAK_PATTERN = re.compile(r'(?<=[.!?])\s+|(?<=[.!?]["\')\]])\s+')
+
+def split_sentences(text):
+    """
+    Split text into sentences, keeping their punctuation
+
+    Args:
+        text (str): The text to split
+
+    Returns:
+        list: Non-empty sentences
+    """
+    return [s.strip() for s in SENTENCE_BREAK_PATTERN.split(text) if s.strip()]
+
+def request_cost(text):
+    """Number of bytes text takes up inside the SSML document"""
+    return len(escape(text).encode('utf-8'))
+
+def chunk_capacity(envelope_bytes, max_ssml_bytes=MAX_SSML_BYTES, max_audio_seconds=MAX_AUDIO_SECONDS,
+                   chars_per_second=MIN_CHARS_PER_SECOND):
+    """
+    Largest text cost that fits in one request
+
+    Args:
+        envelope_bytes (int): Size of the SSML envelope around the text
+        max_ssml_bytes (int): Azure's SSML size limit
+        max_audio_seconds (int): Azure's audio length limit
+        chars_per_second (float): Conservative speaking rate estimate
+
+    Returns:
+        int: Capacity in bytes of escaped text
+    """
+    byte_budget = (max_ssml_bytes - envelope_bytes) * SAFETY_MARGIN
+    duration_budget = max_audio_seconds * SAFETY_MARGIN * chars_per_second
+    return int(min(byte_budget, duration_budget))
+
+def _split_long_sentence(sentence, capacity):
+    """Split a sentence that does not fit in one request at word boundaries"""
+    pieces = []
+    current = []
+    current_cost = 0
+    for word in sentence.split():
+        cost = request_cost(word) + (1 if current else 0)
+        if current and current_cost + cost > capacity:
+            pieces.append(' '.join(current))
+            current, current_cost = [], 0
+            cost = request_cost(word)
+        current.append(word)
+        current_cost += cost
+    if current:
+        pieces.append(' '.join(current))
+    return pieces
+
+def _pack(units, costs, limit):
+    """Greedily pack units (in order) into groups whose total cost stays within limit"""
+    groups = []
+    current = []
+    current_cost = 0
+    for unit, cost in zip(units, costs):
+        joined_cost = cost + (1 if current else 0)
+        if current and current_cost + joined_cost > limit:
+            groups.append(current)
+            current, current_cost = [], 0
+            joined_cost = cost
+        current.append(unit)
+        current_cost += joined_cost
+    if current:
+        groups.append(current)
+    return groups
+
+def plan_chunks(text, capacity):
+    """
+    Pack the sentences of a text section into as few TTS requests as possible
+
+    Greedy in-order packing gives the minimum number of requests; the size
+    limit is then lowered as far as possible without adding a request, so
+    the chunks come out evenly sized rather than full chunks plus a short tail.
+
+    Args:
+        text (str): The section text
+        capacity (int): Maximum text cost per request (see chunk_capacity)
+
+    Returns:
+        list: Text chunks, each made of whole sentences
+    """
+    units = []
+    for sentence in split_sentences(text):
+        if request_cost(sentence) > capacity:
+            units.extend(_split_long_sentence(sentence, capacity))
+        else:
+            units.append(sentence)
+    if not units:
+        return []
+
+    costs = [request_cost(unit) for unit in units]
+    request_count = len(_pack(units, costs, capacity))
+
+    # Binary search the smallest limit that still needs only request_count requests
+    low, high = max(costs), capacity
+    while low < high:
+        middle = (low + high) // 2
+        if len(_pack(units, costs, middle)) <= request_count:
+            high = middle
+        else:
+            low = middle + 1
+
+    return [' '.join(group) for group in _pack(units, costs, low)]
+
+class EpisodePlan:
+    """
+    TTS request plan for all text sections of an episode
+
+    Each request is a list of parts, where a part is a (section_index, text)
+    tuple. A plain request has one part (a chunk of one section); a batched
+    request has several parts, each a whole section.
+    """
+
+    def __init__(self, requests, section_count, capacity):
+        """
+        Args:
+            requests (list): The planned requests, in transcript order
+            section_count (int): Number of text sections in the episode
+            capacity (int): Maximum text cost per request used for the plan
+        """
+        self.requests = requests
+        self.capacity = capacity
+        self.request_texts = [[text for _, text in request] for request in requests]
+
+        self._section_parts = [[] for _ in range(section_count)]
+        for request_index, request in enumerate(requests):
+            for part_index, (section_index, _) in enumerate(request):
+                self._section_parts[section_index].append((request_index, part_index))
+
+    def section_parts(self, section_index):
+        """(request_index, part_index) of every part of a text section, in order"""
+        return self._section_parts[section_index]
+
+    def report(self):
+        """Print a summary of the plan"""
+        costs = [sum(request_cost(text) for text in texts) for texts in self.request_texts]
+        total = sum(costs)
+        batched = sum(1 for texts in self.request_texts if len(texts) > 1)
+        print(f"TTS plan: {len(self._section_parts)} text sections -> {len(self.requests)} requests "
+              f"({batched} batching several sections, capacity {self.capacity} bytes/request)")
+        if costs:
+            print(f"  Text per request: avg {total // len(costs)}, max {max(costs)} bytes; "
+                  f"~{total / MIN_CHARS_PER_SECOND / 60:.1f} min of audio at most")
+
+def plan_episode(section_texts, envelope_bytes, batch_sections=False, separator_bytes=0,
+                 max_sections_per_request=MAX_SECTIONS_PER_REQUEST, **limits):
+    """
+    Plan the TTS requests for every text section of an episode
+
+    Args:
+        section_texts (list): Text of each section, in transcript order
+        envelope_bytes (int): Size of the SSML envelope around each request's text
+        batch_sections (bool): Send consecutive sections that fit together in one request
+        separator_bytes (int): Size of the markup between batched sections
+        max_sections_per_request (int): Upper bound on sections batched into one request
+        **limits: Overrides for chunk_capacity (max_ssml_bytes, max_audio_seconds, chars_per_second)
+
+    Returns:
+        EpisodePlan: The plan
+    """
+    capacity = chunk_capacity(envelope_bytes, **limits)
+    requests = []
+    batch = []
+    batch_cost = 0
+
+    for section_index, text in enumerate(section_texts):
+        chunks = plan_chunks(text, capacity)
+        if not batch_sections or len(chunks) != 1:
+            # Sections that need several requests are never batched
+            if batch:
+                requests.append(batch)
+                batch, batch_cost = [], 0
+            requests.extend([(section_index, chunk)] for chunk in chunks)
+            continue
+
+        cost = request_cost(chunks[0]) + (separator_bytes if batch else 0)
+        if batch and (batch_cost + cost > capacity or len(batch) >= max_sections_per_request):
+            requests.append(batch)
+            batch, batch_cost = [], 0
+            cost = request_cost(chunks[0])
+        batch.append((section_index, chunks[0]))
+        batch_cost += cost
+
+    if batch:
+        requests.append(batch)
+
+    return EpisodePlan(requests, len(section_texts), capacity)
@@ -3,10 +3,8 @@ import email
 from email.header import decode_header
 from bs4 import BeautifulSoup
 import os
-from datetime import datetime
-import pytz
-from email.utils import parsedate_to_datetime
 import sys
+from scripts.articles import MAX_ARTICLE_AGE_HOURS, SAST, Article, hours_since, parse_published
 from scripts.secure_secrets import get_email_credentials
 
 # Load email credentials from secure secrets
@@ -20,51 +18,10 @@ except Exception as e:
     print(f"ERROR: Failed to load email credentials: {e}")
     sys.exit(1)
 
-def convert_to_sast(date_str):
-    """
-    Convert email date string to SAST timezone and format nicely
-    """
-    try:
-        # Parse the email date string to datetime
-        dt = parsedate_to_datetime(date_str)
-        
-        # Convert to SAST
-        sast = pytz.timezone('Africa/Johannesburg')
-        sast_time = dt.astimezone(sast)
-        
-        # Format in a readable way with SAST explicitly mentioned
-        return sast_time.strftime('%a, %d %b %Y %H:%M (SAST)')
-    except Exception as e:
-        print(f"Error converting date: {e}")
-        return date_str
-
-def is_within_24_hours(date_str):
-    """Check if the given date is within the last 24 hours"""
-    try:
-        # Parse the date string
-        print(f"\nDEBUG: Raw date string: {date_str}")
-        dt = parsedate_to_datetime(date_str)
-        print(f"DEBUG: Parsed datetime: {dt}")
-        
-        # Get current time in UTC
-        now = datetime.now(pytz.UTC)
-        print(f"DEBUG: Current UTC time: {now}")
-        
-        # Calculate the time difference in hours
-        time_diff_hours = (now - dt).total_seconds() / 3600
-        
-        # Debug logging
-        print(f"DEBUG: Newsletter timestamp: {dt}")
-        print(f"DEBUG: Current timestamp: {now}")
-        print(f"DEBUG: Hours old: {time_diff_hours:.1f}")
-        print(f"DEBUG: Within 24h? {time_diff_hours <= 24}")
-        
-        # Strict 24-hour check
-        return time_diff_hours <= 24
-    except Exception as e:
-        print(f"ERROR: Error checking date: {e}")
-        print(f"ERROR: Problematic date string: {date_str}")
-        return False
+def format_newsletter(newsletter):
+    """Render a newsletter Article as the text block the summary prompt reads"""
+    return (f"=== {newsletter.source}: {newsletter.title} - {newsletter.published_sast} ===\n\n"
+            f"{newsletter.body}\n\n")
 
 def fetch_newsletter_from_email():
     """
@@ -73,6 +30,10 @@ def fetch_newsletter_from_email():
     Requires:
     - Email account credentials in .env file
     - Newsletter subscriptions to South African news sources
+    
+    Returns:
+        list: Articles (title is the subject, body the newsletter text) from the last
+            24 hours, or None if the mailbox could not be read
     """
     # Email account credentials from secure secrets
     email_creds = get_email_credentials()
@@ -145,13 +106,17 @@ def fetch_newsletter_from_email():
                 print(f"Date: {msg['Date']}")
                 
                 # Check if the email is within 24 hours
-                if not is_within_24_hours(msg["Date"]):
+                published = parse_published(msg["Date"])
+                if published is None:
+                    print(f"Skipping newsletter - no usable date: {subject}")
+                    continue
+                hours_old = hours_since(published)
+                print(f"DEBUG: Hours old: {hours_old:.1f}")
+                if hours_old > MAX_ARTICLE_AGE_HOURS:
                     print(f"Skipping newsletter - older than 24 hours: {subject}")
                     continue
                     
-                # Convert date to SAST
-                date_sast = convert_to_sast(msg["Date"])
-                print(f"Processing newsletter: {subject} (SAST: {date_sast})")
+                print(f"Processing newsletter: {subject} (SAST: {published.astimezone(SAST):%a, %d %b %Y %H:%M})")
                 
                 # Extract the HTML content
                 newsletter_content = ""
@@ -208,13 +173,7 @@ def fetch_newsletter_from_email():
                         source_name = "News24"
                     
                     # Add to our collection
-                    newsletter_data = {
-                        'source': source_name,
-                        'subject': subject,
-                        'date': date_sast,
-                        'content': text_content
-                    }
-                    all_newsletters.append(newsletter_data)
+                    all_newsletters.append(Article(source_name, subject, published, body=text_content))
                     print(f"✅ Successfully processed newsletter from {source_name}: {subject}")
                 else:
                     print(f"❌ No HTML content found in newsletter: {subject}")
@@ -253,17 +212,13 @@ if __name__ == "__main__":
     # Always open the file in write mode to either update with new content or clear old content
     with open("outputs/newsletter_content.txt", "w", encoding="utf-8") as f:
         if newsletters:
-            combined_content = ""
             for newsletter in newsletters:
-                print(f"Retrieved: {newsletter['source']} - {newsletter['subject']} ({newsletter['date']})")
+                print(f"Retrieved: {newsletter.source} - {newsletter.title} ({newsletter.published_sast})")
                 print("\nEXCERPT:")
-                print(newsletter['content'][:500] + "...")
-                
-                # Combine content with clear separation and cleaner date format
-                combined_content += f"=== {newsletter['source']}: {newsletter['subject']} - {newsletter['date']} ===\n\n"
-                combined_content += newsletter['content'] + "\n\n"
+                print(newsletter.body[:500] + "...")
             
-            f.write(combined_content)
+            # Combine content with clear separation and cleaner date format
+            f.write("".join(format_newsletter(newsletter) for newsletter in newsletters))
             print(f"\nFull newsletters saved to outputs/newsletter_content.txt")
         else:
             # Write a clear message when no recent newsletters are found
@@ -0,0 +1,204 @@
+# ABOUTME: Per-episode render manifest recording where each segment sits in the episode's PCM timeline
+# ABOUTME: Lets a re-run re-synthesize only the sections whose text changed and splice in the rest
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from scripts.audio_engine import BLOCK_FRAMES, TARGET_CHANNELS, TARGET_SAMPLE_RATE, TARGET_SAMPLE_WIDTH
+
+DEFAULT_EPISODE_DIR = Path.home() / ".cache" / "sa-podcast" / "episodes"
+DEFAULT_KEEP_EPISODES = 7
+MANIFEST_VERSION = 1
+
+def episode_dir():
+    """Directory holding episode PCM artifacts (EPISODE_CACHE_DIR env var or ~/.cache/sa-podcast/episodes)"""
+    return Path(os.getenv('EPISODE_CACHE_DIR', DEFAULT_EPISODE_DIR))
+
+def manifest_path_for(output_file):
+    """Path of the manifest of an episode MP3, kept in the episode cache next to its PCM"""
+    return str(episode_dir() / f"{Path(output_file).stem}.manifest.json")
+
+def stored_pcm_path(pcm_file):
+    """
+    pcm_file as recorded in a manifest: relative to episode_dir() when it lives there
+
+    The episode cache can then be moved (or restored under another home
+    directory) without invalidating its manifests.
+    """
+    relative = os.path.relpath(os.path.abspath(pcm_file), os.path.abspath(episode_dir()))
+    return pcm_file if relative.startswith(os.pardir) else relative
+
+def resolve_pcm_path(stored):
+    """Path of a manifest's PCM artifact (see stored_pcm_path)"""
+    return stored if os.path.isabs(stored) else str(episode_dir() / stored)
+
+def prune_episodes(directory, keep=None):
+    """
+    Remove all but the most recently written episode PCM artifacts, and their manifests
+
+    Args:
+        directory (Path): Episode artifact directory
+        keep (int, optional): Number of artifacts to keep. Defaults to EPISODE_CACHE_KEEP
+            env var or DEFAULT_KEEP_EPISODES
+    """
+    if keep is None:
+        keep = int(os.getenv('EPISODE_CACHE_KEEP', DEFAULT_KEEP_EPISODES))
+    artifacts = sorted((entry.stat().st_mtime, entry.path) for entry in os.scandir(directory)
+                       if entry.name.endswith('.pcm'))
+    for _, path in artifacts[:max(0, len(artifacts) - keep)]:
+        for stale in (path, path[:-len('.pcm')] + '.manifest.json'):
+            try:
+                os.remove(stale)
+            except FileNotFoundError:
+                pass
+
+class EpisodeManifest:
+    """
+    Where each segment of a rendered episode lives in the episode's raw PCM artifact
+
+    Each segment is a dict with its kind ('music' or 'speech'), the text hash
+    of speech segments (a TTSCache key), the music source path, and its
+    sample_offset and samples (both in frames) within pcm_file.
+    """
+
+    def __init__(self, pcm_file, segments, sample_rate=TARGET_SAMPLE_RATE, channels=TARGET_CHANNELS):
+        """
+        Args:
+            pcm_file (str): Raw 16-bit PCM of the whole episode
+            segments (list): Segment dicts, in playback order
+            sample_rate (int): Sample rate of pcm_file
+            channels (int): Channel count of pcm_file
+        """
+        self.pcm_file = str(pcm_file)
+        self.segments = segments
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frame_size = TARGET_SAMPLE_WIDTH * channels
+
+    @classmethod
+    def load(cls, path, sample_rate=TARGET_SAMPLE_RATE, channels=TARGET_CHANNELS):
+        """
+        Load a manifest whose PCM artifact is still usable
+
+        Returns:
+            EpisodeManifest: The manifest, or None if it is missing, unreadable, in another
+                format, or its PCM artifact is gone
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if (data.get('version') != MANIFEST_VERSION or data['sample_rate'] != sample_rate
+                    or data['channels'] != channels):
+                return None
+            pcm_file = resolve_pcm_path(data['pcm_file'])
+            if os.path.getsize(pcm_file) != data['pcm_bytes']:
+                return None
+            return cls(pcm_file, data['segments'], sample_rate, channels)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save(self, path):
+        """Atomically write the manifest to path"""
+        data = {
+            'version': MANIFEST_VERSION,
+            'pcm_file': stored_pcm_path(self.pcm_file),
+            'pcm_bytes': os.path.getsize(self.pcm_file),
+            'sample_rate': self.sample_rate,
+            'channels': self.channels,
+            'segments': self.segments,
+        }
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def find(self, key):
+        """Speech segment rendered from the text with this key, or None"""
+        for segment in self.segments:
+            if segment['kind'] == 'speech' and segment['key'] == key:
+                return segment
+        return None
+
+    def iter_segment_pcm(self, segment, block_frames=BLOCK_FRAMES):
+        """
+        Stream a segment's PCM out of the episode artifact
+
+        Yields:
+            bytes: 16-bit PCM frames in the manifest's format
+        """
+        remaining = segment['samples'] * self.frame_size
+        with open(self.pcm_file, 'rb') as f:
+            f.seek(segment['sample_offset'] * self.frame_size)
+            while remaining > 0:
+                block = f.read(min(remaining, block_frames * self.frame_size))
+                if not block:
+                    raise EOFError(f"Episode PCM {self.pcm_file} ends inside a segment")
+                remaining -= len(block)
+                yield block
+
+class EpisodeRecorder:
+    """Tees the episode PCM stream into a new PCM artifact and records where each segment lands"""
+
+    def __init__(self, pcm_file, sample_rate=TARGET_SAMPLE_RATE, channels=TARGET_CHANNELS):
+        """
+        Args:
+            pcm_file (str): Where the episode PCM is stored once the render succeeds
+            sample_rate (int): Sample rate of the recorded stream
+            channels (int): Channel count of the recorded stream
+        """
+        self.pcm_file = Path(pcm_file)
+        self.pcm_file.parent.mkdir(parents=True, exist_ok=True)
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frame_size = TARGET_SAMPLE_WIDTH * channels
+        self.segments = []
+        self._frames = 0
+        fd, self._temp_path = tempfile.mkstemp(dir=self.pcm_file.parent, suffix='.tmp')
+        self._out = os.fdopen(fd, 'wb')
+
+    def record(self, kind, pcm_blocks, key=None, source=None):
+        """
+        Pass a segment's PCM blocks through, writing them to the artifact
+
+        Args:
+            kind (str): 'music' or 'speech'
+            pcm_blocks (iterable): The segment's 16-bit PCM blocks
+            key (str, optional): Text hash of a speech segment
+            source (str, optional): Source file of a music segment
+
+        Yields:
+            bytes: The same PCM blocks
+        """
+        start = self._frames
+        for block in pcm_blocks:
+            self._out.write(block)
+            self._frames += len(block) // self.frame_size
+            yield block
+        self.segments.append({
+            'kind': kind,
+            'key': key,
+            'source': source,
+            'sample_offset': start,
+            'samples': self._frames - start,
+            'duration_seconds': round((self._frames - start) / self.sample_rate, 3),
+        })
+
+    def commit(self, manifest_file):
+        """Move the PCM artifact into place and write the manifest describing it"""
+        self._out.close()
+        os.replace(self._temp_path, self.pcm_file)
+        EpisodeManifest(self.pcm_file, self.segments, self.sample_rate, self.channels).save(manifest_file)
+        prune_episodes(self.pcm_file.parent)
+
+    def discard(self):
+        """Drop the partially written artifact"""
+        self._out.close()
+        if os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
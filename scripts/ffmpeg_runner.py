@@ -0,0 +1,209 @@
+# ABOUTME: Runs ffmpeg from argument vectors with timeouts, captured stderr and a cap on concurrent processes
+# ABOUTME: Streams PCM through stdin/stdout pipes and times every invocation so ffmpeg cost per episode is visible
+
+import os
+import subprocess
+import tempfile
+import threading
+import time
+
+DEFAULT_TIMEOUT_SECONDS = 600
+READ_BLOCK_BYTES = 64 * 1024
+
+# Keep this much of ffmpeg's stderr in error messages
+STDERR_TAIL_BYTES = 2000
+
+class FFmpegError(Exception):
+    """ffmpeg failed, timed out or could not be started"""
+
+    def __init__(self, label, returncode, stderr=''):
+        self.label = label
+        self.returncode = returncode
+        self.stderr = stderr
+        detail = f": {stderr.strip()}" if stderr.strip() else ""
+        reason = "timed out" if returncode is None else f"failed with exit code {returncode}"
+        super().__init__(f"ffmpeg {label} {reason}{detail}")
+
+class FFmpegRunner:
+    """
+    Runs ffmpeg processes, at most max_processes run() and read() calls at a time
+
+    Every call passes an argument vector (no shell), captures stderr for error
+    messages, is killed after its timeout, and is timed. Timings are logged
+    per call and summed per label for report().
+
+    feed() is not counted against the cap: its input is often produced by
+    read() calls, which would wait forever for a slot it held.
+    """
+
+    def __init__(self, max_processes=None, timeout=DEFAULT_TIMEOUT_SECONDS):
+        """
+        Args:
+            max_processes (int, optional): Concurrent ffmpeg processes. Defaults to the CPU count
+            timeout (float): Default per-call timeout in seconds
+        """
+        self.max_processes = max_processes or os.cpu_count() or 1
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.max_processes)
+        self._lock = threading.Lock()
+        self._timings = {}
+
+    @classmethod
+    def from_env(cls):
+        """Create a runner from the FFMPEG_MAX_PROCESSES and FFMPEG_TIMEOUT env vars"""
+        return cls(int(os.getenv('FFMPEG_MAX_PROCESSES', 0)) or None,
+                   float(os.getenv('FFMPEG_TIMEOUT', DEFAULT_TIMEOUT_SECONDS)))
+
+    def command(self, args):
+        """Full argv for ffmpeg with the given arguments"""
+        return ['ffmpeg', '-y', '-hide_banner', '-nostdin', '-loglevel', 'error', *args]
+
+    def run(self, args, label='run', timeout=None):
+        """
+        Run ffmpeg to completion
+
+        Args:
+            args (list): ffmpeg arguments (inputs, options, outputs)
+            label (str): Name of the call in logs and errors
+            timeout (float, optional): Seconds before ffmpeg is killed. Defaults to the runner's
+
+        Raises:
+            FFmpegError: If ffmpeg fails, times out or cannot be started
+        """
+        with self._slots:
+            started = time.monotonic()
+            try:
+                result = subprocess.run(self.command(args), stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                        stderr=subprocess.PIPE, timeout=timeout or self.timeout)
+            except subprocess.TimeoutExpired as e:
+                self._record(label, started)
+                raise FFmpegError(label, None, _tail(e.stderr)) from e
+            except OSError as e:
+                raise FFmpegError(label, -1, str(e)) from e
+            self._record(label, started)
+        if result.returncode != 0:
+            raise FFmpegError(label, result.returncode, _tail(result.stderr))
+
+    def feed(self, args, blocks, label='feed', timeout=None):
+        """
+        Run ffmpeg reading its input from stdin (args should include '-i pipe:0')
+
+        Blocks are written as the iterable produces them, so ffmpeg can encode
+        while the input is still being generated. The timeout covers the wait
+        after the input ends, not the time spent producing it. The process runs
+        outside the max_processes cap, as blocks may come from other ffmpeg calls.
+
+        Args:
+            args (list): ffmpeg arguments
+            blocks (iterable): Bytes to write to ffmpeg's stdin
+            label (str): Name of the call in logs and errors
+            timeout (float, optional): Seconds to wait for ffmpeg once the input ends
+
+        Raises:
+            FFmpegError: If ffmpeg fails, times out or cannot be started
+            Exception: Whatever the blocks iterable raised (ffmpeg is killed)
+        """
+        with tempfile.TemporaryFile() as stderr:
+            started = time.monotonic()
+            try:
+                process = subprocess.Popen(self.command(args), stdin=subprocess.PIPE,
+                                           stdout=subprocess.DEVNULL, stderr=stderr)
+            except OSError as e:
+                raise FFmpegError(label, -1, str(e)) from e
+            try:
+                for block in blocks:
+                    process.stdin.write(block)
+            except BrokenPipeError:
+                pass  # ffmpeg exited early; its exit code reports why
+            except BaseException:
+                process.kill()
+                process.wait()
+                raise
+            finally:
+                try:
+                    process.stdin.close()
+                except BrokenPipeError:
+                    pass
+            returncode = self._wait(process, timeout)
+            self._record(label, started)
+            if returncode != 0:
+                stderr.seek(0)
+                raise FFmpegError(label, returncode, _tail(stderr.read()))
+
+    def read(self, args, label='read', timeout=None):
+        """
+        Run ffmpeg writing its output to stdout (args should end with 'pipe:1')
+
+        Args:
+            args (list): ffmpeg arguments
+            label (str): Name of the call in logs and errors
+            timeout (float, optional): Seconds before ffmpeg is killed. Defaults to the runner's
+
+        Yields:
+            bytes: Blocks of ffmpeg's output as it is produced
+
+        Raises:
+            FFmpegError: If ffmpeg fails, times out or cannot be started
+        """
+        with self._slots, tempfile.TemporaryFile() as stderr:
+            started = time.monotonic()
+            try:
+                process = subprocess.Popen(self.command(args), stdin=subprocess.DEVNULL,
+                                           stdout=subprocess.PIPE, stderr=stderr)
+            except OSError as e:
+                raise FFmpegError(label, -1, str(e)) from e
+            # The deadline is enforced from another thread, as reads block
+            timed_out = threading.Event()
+            timer = threading.Timer(timeout or self.timeout, lambda: (timed_out.set(), process.kill()))
+            timer.start()
+            try:
+                while True:
+                    block = process.stdout.read(READ_BLOCK_BYTES)
+                    if not block:
+                        break
+                    yield block
+            finally:
+                timer.cancel()
+                process.stdout.close()
+                if process.poll() is None:
+                    process.kill()  # The consumer stopped early
+                returncode = process.wait()
+                self._record(label, started)
+            if returncode != 0:
+                stderr.seek(0)
+                raise FFmpegError(label, None if timed_out.is_set() else returncode, _tail(stderr.read()))
+
+    def report(self):
+        """Print how many ffmpeg calls ran and how long they took, per label"""
+        with self._lock:
+            if not self._timings:
+                return
+            total = sum(seconds for _, seconds in self._timings.values())
+            calls = sum(count for count, _ in self._timings.values())
+            details = ', '.join(f"{label} {count}x {seconds:.2f}s"
+                                for label, (count, seconds) in sorted(self._timings.items()))
+            print(f"ffmpeg: {calls} calls in {total:.2f}s ({details})")
+
+    def _wait(self, process, timeout):
+        try:
+            return process.wait(timeout=timeout or self.timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+            return None
+
+    def _record(self, label, started):
+        seconds = time.monotonic() - started
+        print(f"ffmpeg {label} took {seconds:.2f}s")
+        with self._lock:
+            count, total = self._timings.get(label, (0, 0.0))
+            self._timings[label] = (count + 1, total + seconds)
+
+def _tail(stderr):
+    """Last part of ffmpeg's stderr as text"""
+    if not stderr:
+        return ''
+    return stderr[-STDERR_TAIL_BYTES:].decode('utf-8', errors='replace')
+
+# Shared by every ffmpeg call of the process, so the process cap holds across threads
+ffmpeg = FFmpegRunner.from_env()
@@ -0,0 +1,137 @@
+# ABOUTME: Persistent on-disk HTTP cache for feed fetches using ETag / Last-Modified revalidation
+# ABOUTME: Sends conditional GETs and serves the stored body when the publisher answers 304 Not Modified
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+import requests
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "sa-podcast" / "http"
+
+class HTTPCache:
+    """
+    Disk cache of HTTP response bodies with their validators, safe to share between threads
+
+    Only responses carrying an ETag or Last-Modified header are stored. The next
+    fetch of the same URL sends If-None-Match / If-Modified-Since; on 304 the
+    stored body is returned as if the server had sent it again.
+    """
+
+    def __init__(self, cache_dir=None):
+        """
+        Args:
+            cache_dir (str, optional): Cache directory. Defaults to HTTP_CACHE_DIR env var
+                or ~/.cache/sa-podcast/http
+        """
+        if cache_dir is None:
+            cache_dir = os.getenv('HTTP_CACHE_DIR', DEFAULT_CACHE_DIR)
+
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(url):
+        """Build the cache key for a URL"""
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def get(self, session, url, **kwargs):
+        """
+        GET url through session, revalidating a stored copy if there is one
+
+        Args:
+            session (requests.Session): Session to send the request with
+            url (str): URL to fetch
+            **kwargs: Passed on to session.get (e.g. timeout)
+
+        Returns:
+            requests.Response: The server's response, or on 304 a 200 response
+                rebuilt from the cache (with from_cache set to True)
+        """
+        key = self.key_for(url)
+        meta = self._load_meta(key)
+        headers = dict(kwargs.pop('headers', None) or {})
+        if meta is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        response = session.get(url, headers=headers, **kwargs)
+
+        if response.status_code == 304 and meta is not None:
+            cached = self._cached_response(key, url, response)
+            if cached is not None:
+                with self._lock:
+                    self.hits += 1
+                return cached
+
+        with self._lock:
+            self.misses += 1
+        if response.status_code == 200 and (response.headers.get('ETag') or response.headers.get('Last-Modified')):
+            try:
+                self._store(key, url, response)
+            except OSError as e:
+                print(f"Warning: Failed to store {url} in HTTP cache: {e}")
+        return response
+
+    def report(self):
+        """Print revalidation hit/miss counts for this run"""
+        print(f"HTTP cache: {self.hits} not modified, {self.misses} downloaded")
+
+    def _meta_path(self, key):
+        return self.cache_dir / f"{key}.json"
+
+    def _body_path(self, key):
+        return self.cache_dir / f"{key}.body"
+
+    def _load_meta(self, key):
+        try:
+            with open(self._meta_path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _cached_response(self, key, url, not_modified):
+        try:
+            with open(self._body_path(key), 'rb') as f:
+                body = f.read()
+        except OSError:
+            return None
+        meta = self._load_meta(key) or {}
+        cached = requests.Response()
+        cached.status_code = 200
+        cached.url = url
+        cached._content = body
+        cached.headers.update(meta.get('headers', {}))
+        cached.encoding = requests.utils.get_encoding_from_headers(cached.headers)
+        cached.request = not_modified.request
+        cached.from_cache = True
+        return cached
+
+    def _store(self, key, url, response):
+        # Body first, then the metadata that makes it usable
+        self._write_atomically(self._body_path(key), response.content)
+        meta = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'headers': {name: response.headers[name] for name in ('Content-Type',) if name in response.headers},
+        }
+        self._write_atomically(self._meta_path(key), json.dumps(meta).encode('utf-8'))
+
+    def _write_atomically(self, path, data):
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
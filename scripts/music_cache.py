@@ -0,0 +1,100 @@
+# ABOUTME: Build-once cache of music beds pre-converted to the podcast's PCM format
+# ABOUTME: Keyed by source file hash and target format, memory-mapped for reuse by concatenation
+
+import hashlib
+import mmap
+import os
+import tempfile
+from pathlib import Path
+from scripts.audio_engine import TARGET_CHANNELS, TARGET_SAMPLE_RATE, iter_wav_pcm
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "sa-podcast" / "music"
+
+class MusicAssetCache:
+    """
+    Raw 16-bit PCM copies of the music files in the target format
+
+    The first run converts each asset once and stores it on disk; later runs
+    (and repeated uses in the same episode, e.g. transition beds) just map
+    the cached file into memory.
+    """
+
+    def __init__(self, music_files, cache_dir=None, sample_rate=TARGET_SAMPLE_RATE,
+                 channels=TARGET_CHANNELS):
+        """
+        Args:
+            music_files (list): Paths of the music WAV files to serve from the cache
+            cache_dir (str, optional): Cache directory. Defaults to MUSIC_CACHE_DIR env var
+                or ~/.cache/sa-podcast/music
+            sample_rate (int): Target sample rate
+            channels (int): Target channel count
+        """
+        if cache_dir is None:
+            cache_dir = os.getenv('MUSIC_CACHE_DIR', DEFAULT_CACHE_DIR)
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.music_files = {os.path.abspath(f) for f in music_files}
+        self._mapped = {}
+
+    def has(self, path):
+        """Check whether path is one of the cached music assets"""
+        return os.path.abspath(path) in self.music_files
+
+    def _cache_path_for(self, path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return self.cache_dir / f"{digest.hexdigest()}_{self.sample_rate}_{self.channels}.pcm"
+
+    def _build(self, path, cache_path):
+        print(f"Building music cache for {path}")
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for block in iter_wav_pcm(path, self.sample_rate, self.channels):
+                    out.write(block)
+            os.replace(temp_path, cache_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def get_pcm(self, path):
+        """
+        Get the converted PCM frames for a music file, building the cache entry if needed
+
+        Args:
+            path (str): Path to the source music WAV file
+
+        Returns:
+            memoryview: Read-only view of the 16-bit PCM frames
+        """
+        key = os.path.abspath(path)
+        if key not in self._mapped:
+            cache_path = self._cache_path_for(path)
+            if not cache_path.exists():
+                self._build(path, cache_path)
+            with open(cache_path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    self._mapped[key] = (None, memoryview(b''))
+                else:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    self._mapped[key] = (mapped, memoryview(mapped))
+        return self._mapped[key][1]
+
+    def close(self):
+        """Release all memory maps"""
+        for mapped, view in self._mapped.values():
+            view.release()
+            if mapped is not None:
+                mapped.close()
+        self._mapped.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,50 +1,37 @@
+import io
+import os
+import time
 import requests
 import xml.etree.ElementTree as ET
-from datetime import datetime, timedelta
-import pytz
-from email.utils import parsedate_to_datetime
-import feedparser
+from concurrent.futures import ThreadPoolExecutor, wait
+from itertools import groupby
+from datetime import datetime, timezone
+from requests.adapters import HTTPAdapter
+from scripts.articles import MAX_ARTICLE_AGE_HOURS, Article, hours_since, parse_published
+from scripts.http_cache import HTTPCache
 
-def convert_to_sast(date_str):
-    """Convert date string to SAST timezone and format nicely"""
-    try:
-        # Parse the date string to datetime
-        dt = parsedate_to_datetime(date_str)
-        
-        # Convert to SAST
-        sast = pytz.timezone('Africa/Johannesburg')
-        sast_time = dt.astimezone(sast)
-        
-        # Format in a readable way
-        return sast_time.strftime('%a, %d %b %Y %H:%M (SAST)')
-    except Exception as e:
-        print(f"Error converting date: {e}")
-        return date_str
+GOOGLE_NEWS_SA_URL = "https://news.google.com/rss?when:24h&hl=en-ZA&gl=ZA&ceid=ZA:en"
+SUNDAY_TIMES_URL = "https://www.sundaytimes.timeslive.co.za/arc/outboundfeeds/rss/"
+TIMESLIVE_URL = "https://www.timeslive.co.za/arc/outboundfeeds/rss/"
+DAILY_MAVERICK_URL = "https://www.dailymaverick.co.za/dmrss/"
+MAIL_GUARDIAN_URL = "https://mg.co.za/feed/"
 
-def is_within_24_hours(date_str):
-    """Check if the given date is within the last 24 hours"""
-    try:
-        # Parse the date string
-        dt = parsedate_to_datetime(date_str)
-        
-        # Get current time in UTC
-        now = datetime.now(pytz.UTC)
-        
-        # Calculate the time difference in hours
-        time_diff_hours = (now - dt).total_seconds() / 3600
-        
-        # Debug logging
-        print(f"Article timestamp: {dt}")
-        print(f"Current timestamp: {now}")
-        print(f"Hours old: {time_diff_hours:.1f}")
-        print(f"Within 24h? {time_diff_hours <= 24}")
-        
-        # Strict 24-hour check
-        return time_diff_hours <= 24
-    except Exception as e:
-        print(f"Error checking date: {e}")
-        print(f"Problematic date string: {date_str}")
-        return False
+# Seconds to wait for a publisher to accept the connection, and between bytes of its answer
+CONNECT_TIMEOUT_SECONDS = 5
+READ_TIMEOUT_SECONDS = 20
+
+# Seconds all feeds together may take; slower feeds are left out of today's content
+DEFAULT_FETCH_BUDGET_SECONDS = 60
+
+# Consecutive items older than MAX_ARTICLE_AGE_HOURS after which a date-sorted feed
+# is read no further; publishers' "newest first" feeds still contain stray older items
+STALE_ITEMS_BEFORE_STOP = 5
+
+# One pooled session for every feed, so concurrent fetches reuse connections
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=8))
+_session.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=8))
+_session.headers.update({'User-Agent': 'SA News Podcast'})
 
 def write_rss_content_to_file(content, filename="outputs/rss_feeds_content.txt"):
     """Write RSS feed content to a file"""
@@ -52,19 +39,112 @@ def write_rss_content_to_file(content, filename="outputs/rss_feeds_content.txt")
         f.write(content)
     return filename
 
-def process_feed_items(items, source_name):
-    """Process RSS feed items with date filtering and SAST conversion"""
-    content = []
-    recent_count = 0
+class FeedSource:
+    """An RSS feed and how its items are rendered into the day's content"""
+
+    def __init__(self, name, url, source_field=None, source_label=None, body_field=None, date_sorted=False):
+        """
+        Args:
+            name (str): Name the feed's articles are credited to, e.g. 'Daily Maverick'
+            url (str): RSS 2.0 feed URL
+            source_field (str, optional): Item element naming each article's publisher, for
+                aggregators (Google News' <source>)
+            source_label (str, optional): Fixed 'Source:' line for every article of the feed
+            body_field (str, optional): Item element holding the full article text, e.g.
+                'content:encoded'; prefixes are those in NAMESPACES
+            date_sorted (bool): Whether the feed lists newest items first, so reading can stop
+                after STALE_ITEMS_BEFORE_STOP items in a row older than MAX_ARTICLE_AGE_HOURS
+        """
+        self.name = name
+        self.url = url
+        self.source_field = source_field
+        self.source_label = source_label
+        self.body_field = body_field
+        self.date_sorted = date_sorted
+
+    def __repr__(self):
+        return f"FeedSource({self.name!r}, {self.url!r})"
+
+# Namespace prefixes usable in FeedSource fields
+NAMESPACES = {
+    'content': 'http://purl.org/rss/1.0/modules/content/',
+    'dc': 'http://purl.org/dc/elements/1.1/',
+    'media': 'http://search.yahoo.com/mrss/',
+}
+
+# Feeds in the order their content appears. A new source is one more entry here
+# (Google News orders by relevance, so all of it is read)
+RSS_FEEDS = [
+    FeedSource("Google News SA", GOOGLE_NEWS_SA_URL, source_field='source'),
+    FeedSource("Sunday Times", SUNDAY_TIMES_URL, date_sorted=True),
+    FeedSource("TimesLive", TIMESLIVE_URL, source_label="TimesLive", date_sorted=True),
+    FeedSource("Daily Maverick", DAILY_MAVERICK_URL, date_sorted=True),
+    FeedSource("Mail & Guardian", MAIL_GUARDIAN_URL, source_label="Mail & Guardian", date_sorted=True),
+]
+
+def _element_tag(name):
+    """ElementTree tag for a field name such as 'title' or 'content:encoded'"""
+    prefix, _, local = name.rpartition(':')
+    return f"{{{NAMESPACES[prefix]}}}{local}" if prefix else local
+
+def iter_feed_items(content):
+    """
+    Stream the items of an RSS document without building its whole tree
+    
+    Each <item> is read into a dict of its child elements' text by tag (the
+    first occurrence of a tag wins, as with item.find()) and then dropped, so
+    memory stays bounded by one item however long the feed is.
+    
+    Args:
+        content (bytes): The RSS document
+    
+    Yields:
+        dict: Child element text of each item, keyed by ElementTree tag
+    
+    Raises:
+        ET.ParseError: If the document is malformed (items before the error are yielded)
+    """
+    parents = []
+    for event, element in ET.iterparse(io.BytesIO(content), events=('start', 'end')):
+        if event == 'start':
+            parents.append(element)
+            continue
+        parents.pop()
+        if element.tag != 'item':
+            continue
+        fields = {}
+        for child in element:
+            fields.setdefault(child.tag, child.text)
+        yield fields
+        element.clear()
+        if parents:
+            parents[-1].remove(element)
+
+def process_feed_items(items, source):
+    """
+    Process RSS feed items, keeping those from the last 24 hours
+    
+    Args:
+        items (iterable): Items of the feed as produced by iter_feed_items
+        source (FeedSource): Feed the items belong to
+    
+    Returns:
+        list: Articles from the last 24 hours, in feed order
+    """
+    articles = []
+    total_count = 0
     skipped_count = 0
+    stale_run = 0
+    source_tag = _element_tag(source.source_field) if source.source_field else None
+    body_tag = _element_tag(source.body_field) if source.body_field else None
+    now = datetime.now(timezone.utc)
     
-    print(f"\nProcessing {len(items)} items from {source_name}")
+    print(f"\nProcessing items from {source.name}")
     
-    for i, item in enumerate(items):
-        title = item.find("title").text if item.find("title") is not None else "No title"
-        pub_date = item.find("pubDate").text if item.find("pubDate") is not None else None
-        link = item.find("link").text if item.find("link") is not None else "No link"
-        description = item.find("description").text if item.find("description") is not None else "No description"
+    for fields in items:
+        total_count += 1
+        title = fields.get('title') or "No title"
+        pub_date = fields.get('pubDate')
         
         print(f"\n{'='*50}")
         print(f"Checking article: {title}")
@@ -75,293 +155,169 @@ def process_feed_items(items, source_name):
             print("❌ Skipping - No publication date")
             skipped_count += 1
             continue
-            
-        if not is_within_24_hours(pub_date):
+        
+        published = parse_published(pub_date)
+        if published is None:
+            skipped_count += 1
+            continue
+        
+        hours_old = hours_since(published, now)
+        print(f"Hours old: {hours_old:.1f}")
+        if hours_old > MAX_ARTICLE_AGE_HOURS:
             print("❌ Skipping - Article older than 24 hours")
             skipped_count += 1
+            stale_run += 1
+            if source.date_sorted and stale_run >= STALE_ITEMS_BEFORE_STOP:
+                print("Feed is newest first - not reading the older items")
+                break
             continue
+        stale_run = 0
         
         print("✅ Article is within 24 hours - including in feed")
-        # Convert publication date to SAST
-        sast_date = convert_to_sast(pub_date)
-        recent_count += 1
-        
-        # Build article content
-        article_content = f"\nARTICLE {recent_count} ({source_name})\nTitle: {title}\n"
-        
-        if source_name == "Google News SA":
-            source = item.find("source").text if item.find("source") is not None else "Unknown source"
-            article_content += f"Source: {source}\n"
-        
-        if description:
-            article_content += f"Description: {description}\n"
-            
-        if source_name == "Mail & Guardian":
-            content_elem = item.find(".//content:encoded", namespaces={"content": "http://purl.org/rss/1.0/modules/content/"})
-            if content_elem is not None and content_elem.text:
-                article_content += f"Full Content: {content_elem.text}\n"
-        
-        article_content += f"Published: {sast_date}\n"
-        content.append(article_content)
+        if source_tag:
+            publisher = fields.get(source_tag) or "Unknown source"
+        else:
+            publisher = source.source_label
+        articles.append(Article(source.name, title, published,
+                                link=fields.get('link'),
+                                description=fields.get('description', "No description"),
+                                body=fields.get(body_tag) if body_tag else None,
+                                publisher=publisher))
     
-    print(f"\nSummary for {source_name}:")
-    print(f"Total items: {len(items)}")
-    print(f"Recent items (< 24h): {recent_count}")
+    if not total_count:
+        print(f"No news items found in the {source.name} feed.")
+        return articles
+    
+    print(f"\nSummary for {source.name}:")
+    print(f"Items read: {total_count}")
+    print(f"Recent items (< 24h): {len(articles)}")
     print(f"Skipped items: {skipped_count}")
     
-    return content, recent_count
+    return articles
 
-def test_google_news_sa():
-    """Test fetching news from Google News South Africa RSS feed"""
-    feed_url = "https://news.google.com/rss?when:24h&hl=en-ZA&gl=ZA&ceid=ZA:en"
-    
-    try:
-        print("Fetching Google News SA RSS feed...")
-        response = requests.get(feed_url)
-        
-        if response.status_code != 200:
-            print(f"Error: Received status code {response.status_code}")
-            return None
-        
-        # Parse XML
-        root = ET.fromstring(response.content)
-        
-        # Find all items (news articles)
-        items = root.findall(".//item")
-        
-        if not items:
-            print("No news items found in the feed.")
-            return None
-        
-        content, recent_count = process_feed_items(items, "Google News SA")
-        print(f"Found {recent_count} recent news items (last 24 hours).\n")
-        
-        return "\n".join(content) if content else None
-    
-    except Exception as e:
-        print(f"Error fetching or parsing RSS feed: {e}")
-        return None
+def format_article(article, number):
+    """Render an article as the text block the summary prompt reads"""
+    text = f"\nARTICLE {number} ({article.source})\nTitle: {article.title}\n"
+    if article.publisher:
+        text += f"Source: {article.publisher}\n"
+    if article.description:
+        text += f"Description: {article.description}\n"
+    if article.body:
+        text += f"Full Content: {article.body}\n"
+    text += f"Published: {article.published_sast}\n"
+    return text
 
-def test_sundaytimes_rss():
-    """Test fetching RSS from Sunday Times"""
-    feed_url = "https://www.sundaytimes.timeslive.co.za/arc/outboundfeeds/rss/"
+def parse_feed(source, response):
+    """
+    Read the recent articles from a feed's response
+    
+    Args:
+        source (FeedSource): Feed the response belongs to
+        response (requests.Response): The feed's response
     
+    Returns:
+        list: The feed's articles from the last 24 hours; empty if there are none
+            or the feed could not be read
+    """
     try:
-        print("\nFetching Sunday Times RSS feed...")
-        response = requests.get(feed_url)
-        
         if response.status_code != 200:
-            print(f"Error: Received status code {response.status_code}")
-            return None
-        
-        # Parse XML
-        root = ET.fromstring(response.content)
-        items = root.findall(".//item")
-        
-        if not items:
-            print("No news items found in the feed.")
-            return None
+            print(f"Error: {source.name} answered with status code {response.status_code}")
+            return []
         
-        content, recent_count = process_feed_items(items, "Sunday Times")
-        print(f"Found {recent_count} recent news items (last 24 hours).\n")
-        
-        return "\n".join(content) if content else None
+        articles = process_feed_items(iter_feed_items(response.content), source)
+        print(f"Found {len(articles)} recent news items (last 24 hours).\n")
+        return articles
     
     except Exception as e:
-        print(f"Error fetching or parsing RSS feed: {e}")
-        return None
+        print(f"Error parsing {source.name} RSS feed: {e}")
+        return []
 
-def test_timeslive_rss():
-    """Test fetching RSS from TimesLive"""
-    feed_url = "https://www.timeslive.co.za/arc/outboundfeeds/rss/"
+def fetch_feed(feed_url, cache=None):
+    """
+    Fetch a feed through the shared session with connect and read deadlines
     
-    try:
-        print("\nFetching TimesLive RSS feed...")
-        response = requests.get(feed_url)
-        
-        if response.status_code != 200:
-            print(f"Error: Received status code {response.status_code}")
-            return None
-        
-        feed = feedparser.parse(response.content)
-        
-        if not feed.entries:
-            print("No entries found in TimesLive RSS feed")
-            return None
-        
-        print(f"\nProcessing {len(feed.entries)} items from TimesLive")
-        
-        recent_articles = []
-        for i, entry in enumerate(feed.entries):
-            print(f"\n==================================================")
-            print(f"Checking article: {entry.title}")
-            
-            # Check if article is within 24 hours
-            if is_within_24_hours(entry.published):
-                print("✅ Article is within 24 hours - including in feed")
-                
-                # Format the article content
-                article_content = f"""ARTICLE {len(recent_articles) + 1} (TimesLive)
-Title: {entry.title}
-Source: TimesLive
-Description: {entry.description if hasattr(entry, 'description') else 'No description available'}
-Published: {convert_to_sast(entry.published)}
-
-"""
-                recent_articles.append(article_content)
-            else:
-                print("❌ Skipping - Article older than 24 hours")
-        
-        print(f"\nSummary for TimesLive:")
-        print(f"Total items: {len(feed.entries)}")
-        print(f"Recent items (< 24h): {len(recent_articles)}")
-        print(f"Skipped items: {len(feed.entries) - len(recent_articles)}")
-        print(f"Found {len(recent_articles)} recent news items (last 24 hours).\n")
-        
-        return "\n".join(recent_articles) if recent_articles else None
-        
-    except Exception as e:
-        print(f"Error fetching or parsing RSS feed: {e}")
-        return None
+    Args:
+        feed_url (str): Feed URL
+        cache (HTTPCache, optional): Conditional-GET cache; an unchanged feed is
+            served from it after a 304
+    """
+    timeout = (CONNECT_TIMEOUT_SECONDS, READ_TIMEOUT_SECONDS)
+    if cache is not None:
+        return cache.get(_session, feed_url, timeout=timeout)
+    return _session.get(feed_url, timeout=timeout)
 
-def test_mail_guardian_rss():
-    """Test fetching RSS from Mail & Guardian"""
-    feed_url = "https://mg.co.za/feed/"
+def fetch_feeds(feed_urls, budget=None, cache=None):
+    """
+    Fetch several feeds concurrently
     
-    try:
-        print("\nFetching Mail & Guardian RSS feed...")
-        response = requests.get(feed_url)
-        
-        if response.status_code != 200:
-            print(f"Error: Received status code {response.status_code}")
-            return None
-        
-        feed = feedparser.parse(response.content)
-        
-        if not feed.entries:
-            print("No entries found in Mail & Guardian RSS feed")
-            return None
-        
-        print(f"\nProcessing {len(feed.entries)} items from Mail & Guardian")
-        
-        recent_articles = []
-        for i, entry in enumerate(feed.entries):
-            print(f"\n==================================================")
-            print(f"Checking article: {entry.title}")
-            
-            # Check if article is within 24 hours
-            if is_within_24_hours(entry.published):
-                print("✅ Article is within 24 hours - including in feed")
-                
-                # Format the article content
-                article_content = f"""ARTICLE {len(recent_articles) + 1} (Mail & Guardian)
-Title: {entry.title}
-Source: Mail & Guardian
-Description: {entry.description if hasattr(entry, 'description') else 'No description available'}
-Published: {convert_to_sast(entry.published)}
-
-"""
-                recent_articles.append(article_content)
-            else:
-                print("❌ Skipping - Article older than 24 hours")
-        
-        print(f"\nSummary for Mail & Guardian:")
-        print(f"Total items: {len(feed.entries)}")
-        print(f"Recent items (< 24h): {len(recent_articles)}")
-        print(f"Skipped items: {len(feed.entries) - len(recent_articles)}")
-        print(f"Found {len(recent_articles)} recent news items (last 24 hours).\n")
-        
-        return "\n".join(recent_articles) if recent_articles else None
-        
-    except Exception as e:
-        print(f"Error fetching or parsing RSS feed: {e}")
-        return None
-
-def test_daily_maverick_rss():
-    """Test fetching RSS from Daily Maverick"""
-    feed_url = "https://www.dailymaverick.co.za/dmrss/"
+    Args:
+        feed_urls (list): Feed URLs
+        budget (float, optional): Seconds to wait for all feeds together. Defaults to the
+            RSS_FETCH_BUDGET env var or DEFAULT_FETCH_BUDGET_SECONDS
+        cache (HTTPCache, optional): Conditional-GET cache shared by all fetches
     
+    Returns:
+        list: A response per URL, in the same order; None for feeds that failed or
+            did not answer within the budget
+    """
+    if budget is None:
+        budget = float(os.getenv('RSS_FETCH_BUDGET', DEFAULT_FETCH_BUDGET_SECONDS))
+    
+    print(f"Fetching {len(feed_urls)} RSS feeds concurrently (budget {budget:g}s)...")
+    started = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=len(feed_urls))
     try:
-        print("\nFetching Daily Maverick RSS feed...")
-        response = requests.get(feed_url)
-        
-        if response.status_code != 200:
-            print(f"Error: Received status code {response.status_code}")
-            return None
-        
-        # Parse XML
-        root = ET.fromstring(response.content)
-        items = root.findall(".//item")
-        
-        if not items:
-            print("No news items found in the feed.")
-            return None
-        
-        content, recent_count = process_feed_items(items, "Daily Maverick")
-        print(f"Found {recent_count} recent news items (last 24 hours).\n")
-        
-        return "\n".join(content) if content else None
+        futures = [executor.submit(fetch_feed, url, cache) for url in feed_urls]
+        wait(futures, timeout=budget)
+        responses = []
+        for url, future in zip(feed_urls, futures):
+            if not future.done():
+                print(f"Error: {url} did not answer within {budget:g}s - skipping it")
+                responses.append(None)
+            elif future.exception() is not None:
+                print(f"Error fetching {url}: {future.exception()}")
+                responses.append(None)
+            else:
+                responses.append(future.result())
+    finally:
+        # Don't wait for feeds still hanging; their read timeout ends them
+        executor.shutdown(wait=False, cancel_futures=True)
     
-    except Exception as e:
-        print(f"Error fetching or parsing RSS feed: {e}")
-        return None
+    print(f"Fetched {sum(r is not None for r in responses)} of {len(feed_urls)} feeds "
+          f"in {time.monotonic() - started:.1f}s")
+    return responses
 
-def test_mailguardian_rss():
-    """Test fetching RSS from Mail & Guardian"""
-    feed_url = "https://mg.co.za/feed/"
+def get_all_rss_articles():
+    """
+    Fetch every feed in RSS_FEEDS and collect their recent articles
     
-    try:
-        print("\nFetching Mail & Guardian RSS feed...")
-        response = requests.get(feed_url)
-        
-        if response.status_code != 200:
-            print(f"Error: Received status code {response.status_code}")
-            return None
-        
-        # Parse XML
-        root = ET.fromstring(response.content)
-        items = root.findall(".//item")
-        
-        if not items:
-            print("No news items found in the feed.")
-            return None
-        
-        content, recent_count = process_feed_items(items, "Mail & Guardian")
-        print(f"Found {recent_count} recent news items (last 24 hours).\n")
-        
-        return "\n".join(content) if content else None
+    Returns:
+        list: Articles from the last 24 hours, feed by feed in RSS_FEEDS order
+    """
+    articles = []
     
-    except Exception as e:
-        print(f"Error fetching or parsing RSS feed: {e}")
-        return None
+    # Fetch every feed at once, then parse them one by one in a fixed order. Feeds
+    # unchanged since the last run come from the HTTP cache, but are still parsed
+    # again so the 24-hour window moves on
+    cache = HTTPCache()
+    responses = fetch_feeds([source.url for source in RSS_FEEDS], cache=cache)
+    cache.report()
+    for source, response in zip(RSS_FEEDS, responses):
+        if response is not None:
+            articles.extend(parse_feed(source, response))
+    return articles
+
+def format_articles(articles):
+    """Render articles as prompt text, numbered per source and grouped as they come"""
+    blocks = []
+    for source, group in groupby(articles, key=lambda article: article.source):
+        blocks.append("\n".join(format_article(article, number)
+                                for number, article in enumerate(group, start=1)))
+    return "\n\n".join(blocks)
 
 def get_all_rss_content():
     """Get content from all RSS feeds and write to file"""
-    all_content = []
-    
-    # Get content from each feed
-    google_content = test_google_news_sa()
-    if google_content:
-        all_content.append(google_content)
-    
-    sunday_times_content = test_sundaytimes_rss()
-    if sunday_times_content:
-        all_content.append(sunday_times_content)
-    
-    timeslive_content = test_timeslive_rss()
-    if timeslive_content:
-        all_content.append(timeslive_content)
-    
-    daily_maverick_content = test_daily_maverick_rss()
-    if daily_maverick_content:
-        all_content.append(daily_maverick_content)
-    
-    mail_guardian_content = test_mail_guardian_rss()
-    if mail_guardian_content:
-        all_content.append(mail_guardian_content)
-    
-    # Combine all content
-    combined_content = "\n\n".join(all_content) if all_content else ""
+    combined_content = format_articles(get_all_rss_articles())
     
     # Write to file
     if combined_content:
@@ -0,0 +1,126 @@
+# ABOUTME: Audio renditions of an episode (full-quality MP3, low-bitrate mono MP3, Opus) from one ffmpeg run
+# ABOUTME: Builds the multi-output ffmpeg command and writes the sidecar listing each rendition's size and duration
+
+import json
+import os
+import tempfile
+
+class Rendition:
+    """One encoded variant of an episode"""
+
+    def __init__(self, name, suffix, mime_type, bitrate, codec_args, container):
+        """
+        Args:
+            name (str): Short name used in PODCAST_RENDITIONS, e.g. 'opus'
+            suffix (str): Replaces '.mp3' in the episode's file name, e.g. '.64k.mp3'
+            mime_type (str): MIME type advertised in the feed
+            bitrate (int): Target bitrate in bits per second
+            codec_args (list): ffmpeg output options selecting codec, bitrate and layout
+            container (str): ffmpeg output format
+        """
+        self.name = name
+        self.suffix = suffix
+        self.mime_type = mime_type
+        self.bitrate = bitrate
+        self.codec_args = codec_args
+        self.container = container
+
+    def path_for(self, output_file):
+        """Path of this rendition of the episode at output_file"""
+        return os.path.splitext(output_file)[0] + self.suffix
+
+# The full-quality MP3 is always written to the episode's own path
+PRIMARY_RENDITION = Rendition('mp3', '.mp3', 'audio/mpeg', 192000,
+                              ['-acodec', 'libmp3lame', '-ab', '192k', '-ar', '44100'], 'mp3')
+
+RENDITIONS = {
+    rendition.name: rendition for rendition in [
+        PRIMARY_RENDITION,
+        # A single voice over music loses little in mono, at a third of the size
+        Rendition('mp3-64k', '.64k.mp3', 'audio/mpeg', 64000,
+                  ['-acodec', 'libmp3lame', '-ab', '64k', '-ac', '1', '-ar', '44100'], 'mp3'),
+        Rendition('opus', '.opus', 'audio/ogg; codecs=opus', 32000,
+                  ['-acodec', 'libopus', '-b:a', '32k', '-ac', '1'], 'ogg'),
+    ]
+}
+
+# No extra renditions unless asked for: each is another binary file committed under public/ every day
+DEFAULT_RENDITIONS = ''
+
+def renditions_from_env():
+    """
+    Extra renditions to encode next to the full-quality MP3
+
+    Reads the comma-separated PODCAST_RENDITIONS env var, e.g. 'mp3-64k,opus'
+    (default empty: the MP3 only).
+
+    Returns:
+        list: Rendition objects, without the primary MP3
+    """
+    names = [name.strip() for name in os.getenv('PODCAST_RENDITIONS', DEFAULT_RENDITIONS).split(',') if name.strip()]
+    unknown = [name for name in names if name not in RENDITIONS]
+    if unknown:
+        raise ValueError(f"Unknown rendition(s) {', '.join(unknown)}; choose from {', '.join(RENDITIONS)}")
+    return [RENDITIONS[name] for name in names if RENDITIONS[name] is not PRIMARY_RENDITION]
+
+def sidecar_path_for(output_file):
+    """Path of the rendition sidecar written next to an episode MP3"""
+    return os.path.splitext(output_file)[0] + '.renditions.json'
+
+def encode_args(outputs, sample_rate, channels):
+    """
+    ffmpeg arguments encoding raw PCM from stdin to every rendition at once
+
+    The input is read and decoded once; each rendition is a separate output
+    of the same process.
+
+    Args:
+        outputs (list): (Rendition, path) pairs
+        sample_rate (int): Sample rate of the PCM stream
+        channels (int): Channel count of the PCM stream
+
+    Returns:
+        list: Arguments for FFmpegRunner.feed
+    """
+    args = ['-f', 's16le', '-ar', str(sample_rate), '-ac', str(channels), '-i', 'pipe:0']
+    for rendition, path in outputs:
+        args += ['-map', '0:a', *rendition.codec_args, '-f', rendition.container, path]
+    return args
+
+def write_sidecar(output_file, outputs, duration_seconds):
+    """
+    Atomically write the sidecar describing every rendition of an episode
+
+    Args:
+        output_file (str): Path of the episode's full-quality MP3
+        outputs (list): (Rendition, path) pairs of every encoded rendition, primary first
+        duration_seconds (float): Length of the episode
+
+    Returns:
+        str: Path of the sidecar
+    """
+    data = {
+        'duration_seconds': round(duration_seconds, 3),
+        'renditions': [
+            {
+                'name': rendition.name,
+                'file': os.path.basename(path),
+                'mime_type': rendition.mime_type,
+                'bitrate': rendition.bitrate,
+                'size': os.path.getsize(path),
+            }
+            for rendition, path in outputs
+        ],
+    }
+    path = sidecar_path_for(output_file)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.chmod(temp_path, 0o644)  # Published next to the MP3
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return path
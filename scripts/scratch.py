@@ -0,0 +1,79 @@
+# ABOUTME: Scratch storage for intermediate audio (TTS chunks, split sections, the combined WAV)
+# ABOUTME: Keeps files on RAM-backed tmpfs when it has room and removes all of them when the run ends
+
+import os
+import shutil
+import tempfile
+
+SHM_DIR = '/dev/shm'
+
+# Only use tmpfs when it has this much room left; an episode's chunks take tens of MB,
+# and containers often mount a 64 MB /dev/shm that other processes rely on
+MIN_SHM_FREE_BYTES = 512 * 1024 * 1024
+
+def scratch_root():
+    """
+    Directory to create scratch spaces in
+
+    The SCRATCH_DIR env var if set, else /dev/shm if it is writable and has at
+    least MIN_SHM_FREE_BYTES free, else the system temp directory.
+    """
+    configured = os.getenv('SCRATCH_DIR')
+    if configured:
+        return configured
+    try:
+        stat = os.statvfs(SHM_DIR)
+        if stat.f_bavail * stat.f_frsize >= MIN_SHM_FREE_BYTES and os.access(SHM_DIR, os.W_OK):
+            return SHM_DIR
+    except OSError:
+        pass
+    return tempfile.gettempdir()
+
+def new_scratch_file(scratch=None, suffix=''):
+    """
+    Create an empty scratch file and return its path
+
+    Args:
+        scratch (ScratchSpace, optional): Space that owns the file. Without one the file
+            goes to the system temp directory and the caller must remove it
+        suffix (str): File name suffix, e.g. '.wav'
+    """
+    if scratch is not None:
+        return scratch.new_file(suffix)
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    return path
+
+class ScratchSpace:
+    """
+    Private scratch directory for one run, removed with everything in it on exit
+
+    Files can still be removed early (e.g. once consumed) to free memory, but
+    nothing created here outlives the with block, whichever way it is left.
+    """
+
+    def __init__(self, root=None, prefix='sa-podcast-'):
+        """
+        Args:
+            root (str, optional): Parent directory. Defaults to scratch_root()
+            prefix (str): Prefix of the scratch directory's name
+        """
+        root = root or scratch_root()
+        os.makedirs(root, exist_ok=True)
+        self.path = tempfile.mkdtemp(prefix=prefix, dir=root)
+
+    def new_file(self, suffix=''):
+        """Create an empty file in the scratch space and return its path"""
+        fd, path = tempfile.mkstemp(suffix=suffix, dir=self.path)
+        os.close(fd)
+        return path
+
+    def close(self):
+        """Remove the scratch directory and every file in it"""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -21,6 +21,8 @@ def load_secrets():
             'claude_api_key': os.getenv('CLAUDE_API_KEY'),
             'azure_speech_key': os.getenv('AZURE_SPEECH_KEY'),
             'azure_speech_region': os.getenv('AZURE_SPEECH_REGION'),
+            # Parsed by get_azure_speech_endpoints, so a bad value only affects TTS
+            'azure_speech_endpoints': os.getenv('AZURE_SPEECH_ENDPOINTS'),
             'email': {
                 'address': os.getenv('EMAIL_ADDRESS'),
                 'password': os.getenv('EMAIL_PASSWORD'),
@@ -69,6 +71,32 @@ def get_azure_speech_region():
     secrets = load_secrets()
     return secrets.get('azure_speech_region')
 
+def get_azure_speech_endpoints():
+    """
+    Get every configured Azure Speech endpoint as (key, region, endpoint URL or None) tuples
+    
+    Uses the azure_speech_endpoints list (AZURE_SPEECH_ENDPOINTS env var as JSON) if set,
+    e.g. [{"key": "...", "region": "southafricanorth"}, {"key": "...", "region": "westeurope"}],
+    otherwise the single azure_speech_key / azure_speech_region pair.
+    
+    Raises:
+        ValueError: If azure_speech_endpoints is not a JSON list of objects
+    """
+    secrets = load_secrets()
+    endpoints = secrets.get('azure_speech_endpoints')
+    if isinstance(endpoints, str):
+        try:
+            # An unset GitHub Actions secret arrives as an empty string
+            endpoints = json.loads(endpoints) if endpoints.strip() else None
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in AZURE_SPEECH_ENDPOINTS: {e}")
+    if endpoints and not (isinstance(endpoints, list) and all(isinstance(entry, dict) for entry in endpoints)):
+        raise ValueError("azure_speech_endpoints must be a list of objects with key, region "
+                         "and optionally endpoint")
+    if endpoints:
+        return [(entry.get('key'), entry.get('region'), entry.get('endpoint')) for entry in endpoints]
+    return [(secrets.get('azure_speech_key'), secrets.get('azure_speech_region'), None)]
+
 def get_email_credentials():
     """Get email credentials from secrets file"""
     secrets = load_secrets()
@@ -0,0 +1,121 @@
+# ABOUTME: Content-addressed on-disk cache for synthesized TTS audio
+# ABOUTME: Keys on sanitized text + voice settings, evicts least recently used files past a size cap
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "sa-podcast" / "tts"
+DEFAULT_MAX_MB = 500
+
+class TTSCache:
+    """
+    Disk cache of TTS audio files, safe to share between TTS worker threads
+
+    Entries are written atomically (temp file + rename) and their mtime is
+    bumped on every hit, so eviction can drop the least recently used files.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        """
+        Args:
+            cache_dir (str, optional): Cache directory. Defaults to TTS_CACHE_DIR env var
+                or ~/.cache/sa-podcast/tts
+            max_bytes (int, optional): Size cap in bytes. Defaults to TTS_CACHE_MAX_MB env var
+                or DEFAULT_MAX_MB megabytes
+        """
+        if cache_dir is None:
+            cache_dir = os.getenv('TTS_CACHE_DIR', DEFAULT_CACHE_DIR)
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv('TTS_CACHE_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024)
+
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(text, voice, prosody_rate, output_format):
+        """Build the cache key for a piece of sanitized text and its voice settings"""
+        digest = hashlib.sha256()
+        for part in (text, voice, prosody_rate, output_format):
+            digest.update(str(part).encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _path_for(self, key):
+        return self.cache_dir / f"{key}.wav"
+
+    def get(self, key, output_file):
+        """
+        Copy a cached entry to output_file
+
+        Args:
+            key (str): Cache key from key_for()
+            output_file (str): Where to write the cached audio
+
+        Returns:
+            bool: True on a cache hit, False on a miss
+        """
+        path = self._path_for(key)
+        try:
+            shutil.copyfile(path, output_file)
+            os.utime(path)  # Mark as recently used
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return False
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def put(self, key, source_file):
+        """
+        Atomically store a copy of source_file under key, then enforce the size cap
+
+        Args:
+            key (str): Cache key from key_for()
+            source_file (str): Audio file to cache
+        """
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as dst, open(source_file, 'rb') as src:
+                shutil.copyfileobj(src, dst)
+            os.replace(temp_path, self._path_for(key))
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith('.wav'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+            if total <= self.max_bytes:
+                return
+            for _, size, path in sorted(entries):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+    def report(self):
+        """Print hit/miss counts for this run"""
+        lookups = self.hits + self.misses
+        hit_rate = (self.hits / lookups * 100) if lookups else 0.0
+        print(f"TTS cache: {self.hits} hits, {self.misses} misses ({hit_rate:.0f}% hit rate)")
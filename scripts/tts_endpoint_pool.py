@@ -0,0 +1,366 @@
+# ABOUTME: Pool of Azure TTS endpoints (region/key pairs) with health-weighted routing and failover
+# ABOUTME: Sends each request to the endpoint with the best recent latency and error rate, same voice everywhere
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+import requests
+from scripts.azure_tts import (
+    DEFAULT_OUTPUT_FORMAT, DEFAULT_PROSODY_RATE, DEFAULT_VOICE, STREAM_CHUNK_SIZE, AzureTTSClient,
+    build_ssml, retry_after_seconds
+)
+from scripts.azure_tts_async import AsyncAzureTTSClient
+from scripts.secure_secrets import get_azure_speech_endpoints
+from scripts.tts_hedging import HedgeCancelled, HedgePolicy, run_hedged, run_hedged_async
+
+# Weight of the newest observation in the moving averages
+HEALTH_SMOOTHING = 0.3
+
+# How much a recent error rate of 100% inflates an endpoint's latency score
+ERROR_PENALTY = 4.0
+
+# Latency assumed for an endpoint before its first request, low so every endpoint gets tried
+UNTRIED_LATENCY_SECONDS = 0.001
+
+# How long a throttled endpoint is avoided when it sends no Retry-After
+THROTTLE_COOLDOWN_SECONDS = 5.0
+
+# How long an endpoint is avoided after a connection error, server error or rejected key
+FAILURE_COOLDOWN_SECONDS = 30.0
+
+# Statuses worth retrying on another endpoint (auth failures are often per-region keys)
+FAILOVER_STATUSES = (401, 403, 408, 429)
+
+class EndpointHealth:
+    """Recent latency, error rate and load of one endpoint"""
+
+    def __init__(self, name):
+        self.name = name
+        self.latency = None
+        self.error_rate = 0.0
+        self.in_flight = 0
+        self.cooldown_until = 0.0
+        self.requests = 0
+        self.errors = 0
+
+    def score(self):
+        """Lower is better: latency scaled up by requests in flight and recent errors"""
+        if self.latency is None:
+            if self.errors:
+                return float('inf')  # It has only ever failed
+            latency = UNTRIED_LATENCY_SECONDS
+        else:
+            latency = self.latency
+        return latency * (1 + self.in_flight) * (1 + ERROR_PENALTY * self.error_rate)
+
+class EndpointSelector:
+    """Ranks endpoints by health, shared by every request of an episode (thread-safe)"""
+
+    def __init__(self, names):
+        """
+        Args:
+            names (list): Display name of each endpoint, e.g. its region
+        """
+        self.endpoints = [EndpointHealth(name) for name in names]
+        self._lock = threading.Lock()
+
+    def ranked(self):
+        """Endpoint indexes, best first; endpoints cooling down after a failure go last"""
+        now = time.monotonic()
+        with self._lock:
+            return sorted(range(len(self.endpoints)),
+                          key=lambda i: (self.endpoints[i].cooldown_until > now, self.endpoints[i].score()))
+
+    def start(self, index):
+        """Mark a request as sent to an endpoint and return its start time"""
+        with self._lock:
+            self.endpoints[index].in_flight += 1
+            self.endpoints[index].requests += 1
+        return time.monotonic()
+
+    def finish(self, index, started, ok, cooldown=None):
+        """
+        Record the outcome of a request
+
+        Args:
+            index (int): Endpoint index
+            started (float): Value returned by start()
+            ok (bool): The request succeeded
+            cooldown (float, optional): Seconds to avoid the endpoint (it throttled us or failed)
+        """
+        with self._lock:
+            endpoint = self.endpoints[index]
+            endpoint.in_flight -= 1
+            endpoint.error_rate += HEALTH_SMOOTHING * ((0.0 if ok else 1.0) - endpoint.error_rate)
+            if ok:
+                latency = time.monotonic() - started
+                endpoint.latency = latency if endpoint.latency is None else \
+                    endpoint.latency + HEALTH_SMOOTHING * (latency - endpoint.latency)
+            else:
+                endpoint.errors += 1
+            if cooldown is not None:
+                endpoint.cooldown_until = time.monotonic() + cooldown
+
+    def abandon(self, index):
+        """Forget a request that was cancelled (a hedge that lost), without judging the endpoint"""
+        with self._lock:
+            self.endpoints[index].in_flight -= 1
+
+    def report(self):
+        """Print per-endpoint request counts and health"""
+        with self._lock:
+            for endpoint in self.endpoints:
+                latency = f"{endpoint.latency:.2f}s" if endpoint.latency is not None else "n/a"
+                print(f"  TTS endpoint {endpoint.name}: {endpoint.requests} requests, {endpoint.errors} errors, "
+                      f"latency {latency}, error rate {endpoint.error_rate:.0%}")
+
+class _WriteTracker:
+    """Passes audio through to a sink, remembering whether anything was written"""
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.written = False
+
+    def write(self, block):
+        self.written = True
+        self.sink.write(block)
+
+def _outcome(response):
+    """(ok, cooldown, fail over) for a synthesis or token response"""
+    if response.status_code == 200:
+        return True, None, False
+    failover = response.status_code in FAILOVER_STATUSES or response.status_code >= 500
+    cooldown = None
+    if response.status_code in (429, 503):
+        cooldown = retry_after_seconds(response)
+        if cooldown is None:
+            cooldown = THROTTLE_COOLDOWN_SECONDS
+    elif failover:
+        cooldown = FAILURE_COOLDOWN_SECONDS
+    return False, cooldown, failover
+
+class AzureTTSPool:
+    """
+    Drop-in replacement for AzureTTSClient that spreads requests over several endpoints
+
+    Every member client uses the pool's voice, prosody rate and output format,
+    so audio is interchangeable whichever endpoint produced it. Each member
+    keeps its own bearer token. A request that fails on one endpoint (throttling,
+    server or connection errors, a rejected key or token fetch) is retried at
+    once on the next best endpoint, as long as no audio has been written yet.
+    The failing endpoint is avoided for a while.
+    """
+
+    def __init__(self, endpoints, voice=DEFAULT_VOICE, prosody_rate=DEFAULT_PROSODY_RATE,
+                 output_format=DEFAULT_OUTPUT_FORMAT, pool_size=16, hedging=None):
+        """
+        Args:
+            endpoints (list): (subscription key, region, endpoint URL or None) per endpoint
+            voice (str): Neural voice name used on every endpoint
+            prosody_rate (str): SSML prosody rate used on every endpoint
+            output_format (str): Output format used on every endpoint
+            pool_size (int): Maximum number of pooled connections per endpoint
+            hedging (HedgePolicy, optional): Send a duplicate of slow requests (see AzureTTSClient)
+        """
+        if not endpoints:
+            raise ValueError("At least one TTS endpoint is required")
+        self.voice = voice
+        self.prosody_rate = prosody_rate
+        self.output_format = output_format
+        self.pool_size = pool_size
+        self.clients = [
+            AzureTTSClient(key, region, voice=voice, prosody_rate=prosody_rate,
+                           output_format=output_format, pool_size=pool_size, endpoint=endpoint)
+            for key, region, endpoint in endpoints
+        ]
+        self.selector = EndpointSelector([client.region or client.endpoint for client in self.clients])
+        self.hedging = hedging
+        self._hedge_executor = ThreadPoolExecutor(max_workers=pool_size) if hedging else None
+
+    @classmethod
+    def from_secrets(cls, **kwargs):
+        """
+        Create a pool from the Azure Speech endpoints in the secrets file / environment
+
+        See get_azure_speech_endpoints. AZURE_TTS_ENDPOINT applies to entries without
+        their own endpoint URL, and TTS_HEDGE_PERCENTILE enables request hedging.
+
+        Returns:
+            AzureTTSPool: The pool, or None if no endpoint has a key
+        """
+        default_endpoint = os.getenv('AZURE_TTS_ENDPOINT')
+        endpoints = [(key, region, endpoint or default_endpoint)
+                     for key, region, endpoint in get_azure_speech_endpoints() if key]
+        if not endpoints:
+            print("Error: Azure Speech key not found in secrets file")
+            return None
+        kwargs.setdefault('hedging', HedgePolicy.from_env())
+        for _, region, endpoint in endpoints:
+            print(f"Using Azure Speech region: {region}" + (f" via {endpoint}" if endpoint else ""))
+        if kwargs['hedging']:
+            print(f"Hedging TTS requests slower than p{kwargs['hedging'].percentile:g} "
+                  f"(at most {kwargs['hedging'].max_hedge_rate:.0%} of requests)")
+        return cls(endpoints, **kwargs)
+
+    def build_ssml(self, text):
+        """Build the SSML document for text with the pool's voice and rate (see build_ssml)"""
+        return build_ssml(text, self.voice, self.prosody_rate)
+
+    def envelope_bytes(self):
+        """Size in bytes of the SSML envelope added around each request's text"""
+        return len(self.build_ssml('').encode('utf-8'))
+
+    def stream_to(self, text, sink, chunk_size=STREAM_CHUNK_SIZE):
+        """
+        Synthesize text on the healthiest endpoint and write the audio to sink as it arrives
+
+        Args:
+            text (str or list): The (already sanitized) text to speak, or a list of sections
+            sink: Any object with a write(bytes) method
+            chunk_size (int): Size of the blocks read from the response
+
+        Returns:
+            requests.Response: The closed response of the last endpoint tried
+        """
+        if self.hedging is not None:
+            return run_hedged(lambda attempt_sink: self._stream_with_failover(text, attempt_sink, chunk_size),
+                              sink, self.hedging, self._hedge_executor)
+        return self._stream_with_failover(text, sink, chunk_size)
+
+    def _stream_with_failover(self, text, sink, chunk_size):
+        tracker = _WriteTracker(sink)
+        response = None
+        for attempt, index in enumerate(self.selector.ranked()):
+            client = self.clients[index]
+            if attempt:
+                print(f"TTS failing over to {self.selector.endpoints[index].name}")
+            started = self.selector.start(index)
+            try:
+                response = client.stream_to(text, tracker, chunk_size)
+            except HedgeCancelled:
+                self.selector.abandon(index)
+                raise
+            except requests.HTTPError as e:
+                # The token fetch failed (raise_for_status)
+                ok, cooldown, failover = _outcome(e.response)
+                self.selector.finish(index, started, ok=False, cooldown=cooldown)
+                if not failover or tracker.written or attempt == len(self.clients) - 1:
+                    raise
+                continue
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError):
+                self.selector.finish(index, started, ok=False, cooldown=FAILURE_COOLDOWN_SECONDS)
+                if tracker.written or attempt == len(self.clients) - 1:
+                    raise
+                continue
+            except BaseException:
+                self.selector.finish(index, started, ok=False)
+                raise
+
+            ok, cooldown, failover = _outcome(response)
+            self.selector.finish(index, started, ok, cooldown)
+            if ok or not failover or tracker.written:
+                return response
+        return response
+
+    def report(self):
+        """Print per-endpoint health and hedging counters for this run"""
+        self.selector.report()
+        if self.hedging is not None:
+            self.hedging.report()
+
+    def close(self):
+        """Close every endpoint's pooled connections"""
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+        for client in self.clients:
+            client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class AsyncAzureTTSPool:
+    """asyncio variant of AzureTTSPool, sharing its endpoint health and hedging policy"""
+
+    def __init__(self, pool, pool_size=None):
+        """
+        Args:
+            pool (AzureTTSPool): The pool whose endpoints, voice settings and health to use
+            pool_size (int, optional): Connections per endpoint. Defaults to the pool's
+        """
+        self.pool = pool
+        self.voice = pool.voice
+        self.prosody_rate = pool.prosody_rate
+        self.output_format = pool.output_format
+        self.selector = pool.selector
+        self.hedging = pool.hedging
+        self.clients = [AsyncAzureTTSClient.from_client(client, pool_size=pool_size or pool.pool_size, hedging=None)
+                        for client in pool.clients]
+
+    @classmethod
+    def from_client(cls, pool, **kwargs):
+        """Create an async pool over the same endpoints as an AzureTTSPool (see AsyncAzureTTSClient.from_client)"""
+        return cls(pool, **kwargs)
+
+    def build_ssml(self, text):
+        """Build the SSML document for text with the pool's voice and rate (see build_ssml)"""
+        return build_ssml(text, self.voice, self.prosody_rate)
+
+    async def stream_to(self, text, sink, chunk_size=STREAM_CHUNK_SIZE):
+        """Async variant of AzureTTSPool.stream_to"""
+        if self.hedging is not None:
+            return await run_hedged_async(
+                lambda attempt_sink: self._stream_with_failover(text, attempt_sink, chunk_size),
+                sink, self.hedging)
+        return await self._stream_with_failover(text, sink, chunk_size)
+
+    async def _stream_with_failover(self, text, sink, chunk_size):
+        tracker = _WriteTracker(sink)
+        response = None
+        for attempt, index in enumerate(self.selector.ranked()):
+            client = self.clients[index]
+            if attempt:
+                print(f"TTS failing over to {self.selector.endpoints[index].name}")
+            started = self.selector.start(index)
+            try:
+                response = await client.stream_to(text, tracker, chunk_size)
+            except (HedgeCancelled, asyncio.CancelledError):
+                self.selector.abandon(index)
+                raise
+            except httpx.HTTPStatusError as e:
+                # The token fetch failed (raise_for_status)
+                ok, cooldown, failover = _outcome(e.response)
+                self.selector.finish(index, started, ok=False, cooldown=cooldown)
+                if not failover or tracker.written or attempt == len(self.clients) - 1:
+                    raise
+                continue
+            except httpx.TransportError:
+                self.selector.finish(index, started, ok=False, cooldown=FAILURE_COOLDOWN_SECONDS)
+                if tracker.written or attempt == len(self.clients) - 1:
+                    raise
+                continue
+            except BaseException:
+                self.selector.finish(index, started, ok=False)
+                raise
+
+            ok, cooldown, failover = _outcome(response)
+            self.selector.finish(index, started, ok, cooldown)
+            if ok or not failover or tracker.written:
+                return response
+        return response
+
+    async def aclose(self):
+        """Close every endpoint's pooled connections"""
+        for client in self.clients:
+            await client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
@@ -0,0 +1,288 @@
+# ABOUTME: Hedged TTS requests: send a duplicate when a request is slower than most, keep the first success
+# ABOUTME: Tracks observed latency, caps the share of duplicated requests and counts hedges sent and won
+
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+
+DEFAULT_HEDGE_PERCENTILE = 95
+DEFAULT_MAX_HEDGE_RATE = 0.1
+DEFAULT_MIN_SAMPLES = 3
+LATENCY_WINDOW = 200
+
+# How often a running request looks again whether it has become slow enough to hedge;
+# an episode's first requests start before any latency has been observed
+HEDGE_RECHECK_SECONDS = 0.1
+
+# Audio of an attempt is buffered in memory up to this size, then on disk
+SPOOL_BYTES = 8 * 1024 * 1024
+
+class HedgeCancelled(Exception):
+    """The other attempt of a hedged request already won"""
+
+class HedgePolicy:
+    """
+    When to send a duplicate request, shared by every request of an episode
+
+    A duplicate goes out once a request has been running longer than the given
+    percentile of recently observed latencies, as long as duplicates stay under
+    max_hedge_rate of all requests (one is always allowed, so short episodes
+    can hedge too). With a limiter, a duplicate also needs a free slot in it,
+    so hedging adds no load while the service is throttling.
+    """
+
+    def __init__(self, percentile=DEFAULT_HEDGE_PERCENTILE, max_hedge_rate=DEFAULT_MAX_HEDGE_RATE,
+                 min_samples=DEFAULT_MIN_SAMPLES, window=LATENCY_WINDOW):
+        """
+        Args:
+            percentile (float): Latency percentile (0-100) after which a request is hedged
+            max_hedge_rate (float): Upper bound on hedges sent per request
+            min_samples (int): Latencies to observe before hedging anything
+            window (int): Number of recent latencies the percentile is computed over
+        """
+        # AdaptiveLimiter of the TTS scheduler the requests run under, if any
+        self.limiter = None
+        self.percentile = percentile
+        self.max_hedge_rate = max_hedge_rate
+        self.min_samples = min_samples
+        self.requests = 0
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """
+        Build a policy from TTS_HEDGE_PERCENTILE and TTS_HEDGE_MAX_RATE
+
+        Returns:
+            HedgePolicy: The policy, or None if hedging is not enabled
+        """
+        percentile = float(os.getenv('TTS_HEDGE_PERCENTILE', 0) or 0)
+        if percentile <= 0:
+            return None
+        return cls(percentile, float(os.getenv('TTS_HEDGE_MAX_RATE', DEFAULT_MAX_HEDGE_RATE)))
+
+    def start_request(self):
+        """Count a new request"""
+        with self._lock:
+            self.requests += 1
+
+    def hedge_delay(self):
+        """
+        How long a request may run before it is hedged
+
+        Returns:
+            float: Seconds, or None while too few latencies have been observed
+        """
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+            return ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))]
+
+    def next_check(self, elapsed):
+        """Seconds until a request running for elapsed seconds should be looked at again (0: hedge now)"""
+        delay = self.hedge_delay()
+        if delay is None:
+            return HEDGE_RECHECK_SECONDS
+        return max(0.0, min(HEDGE_RECHECK_SECONDS, delay - elapsed))
+
+    def try_hedge(self):
+        """
+        Reserve a hedge if the hedge rate and the limiter allow it
+
+        Returns:
+            int: Limiter epoch of the hedge's slot (0 without a limiter), or None if no
+                hedge may be sent now
+        """
+        with self._lock:
+            if self.hedges_sent + 1 > max(1, self.max_hedge_rate * self.requests):
+                return None
+            epoch = 0
+            if self.limiter is not None:
+                epoch = self.limiter.try_acquire()
+                if epoch is None:
+                    return None
+            self.hedges_sent += 1
+            return epoch
+
+    def record(self, seconds):
+        """Record the latency of a successful attempt"""
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def record_win(self):
+        """Count a request that the hedge answered first"""
+        with self._lock:
+            self.hedges_won += 1
+
+    def report(self):
+        """Print hedging counters for this run"""
+        print(f"TTS hedging: {self.hedges_sent} hedges sent for {self.requests} requests, "
+              f"{self.hedges_won} won")
+
+class _AttemptSink:
+    """Buffers one attempt's audio, aborting the attempt once the other one has won"""
+
+    def __init__(self):
+        self.buffer = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+        self.cancelled = False
+
+    def write(self, block):
+        if self.cancelled:
+            raise HedgeCancelled()
+        self.buffer.write(block)
+
+    def copy_to(self, sink):
+        self.buffer.seek(0)
+        shutil.copyfileobj(self.buffer, sink)
+
+def _succeeded(response):
+    return response.status_code == 200
+
+def _throttled(response):
+    return response is not None and response.status_code in (429, 503)
+
+def run_hedged(attempt, sink, policy, executor):
+    """
+    Run a request, duplicating it if it is slow, and copy the winner's audio to sink
+
+    Args:
+        attempt (callable): attempt(sink) performs the request, writes the audio to sink
+            and returns the response
+        sink: Any object with a write(bytes) method
+        policy (HedgePolicy): Hedging policy and counters
+        executor (concurrent.futures.Executor): Runs the attempts
+
+    Returns:
+        The winning response, or the first attempt's response if none succeeded
+
+    Raises:
+        Exception: The first attempt's error, if no attempt succeeded
+    """
+    policy.start_request()
+    attempts = []
+
+    def launch(slot=None):
+        attempt_sink = _AttemptSink()
+        started = time.monotonic()
+
+        def run():
+            response = None
+            try:
+                response = attempt(attempt_sink)
+                if _succeeded(response):
+                    policy.record(time.monotonic() - started)
+                return response
+            finally:
+                if slot is not None and policy.limiter is not None:
+                    succeeded = response is not None and _succeeded(response)
+                    policy.limiter.release(slot, _throttled(response), succeeded)
+
+        future = executor.submit(run)
+        future.add_done_callback(lambda _: attempt_sink.buffer.close() if attempt_sink.cancelled else None)
+        attempts.append((future, attempt_sink))
+
+    started = time.monotonic()
+    launch()
+    while True:
+        timeout = policy.next_check(time.monotonic() - started)
+        if timeout == 0:
+            slot = policy.try_hedge()
+            if slot is not None:
+                launch(slot)
+                break
+            timeout = HEDGE_RECHECK_SECONDS
+        if wait([attempts[0][0]], timeout=timeout).done:
+            break
+
+    try:
+        pending = {future for future, _ in attempts}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for index, (future, attempt_sink) in enumerate(attempts):
+                if future in done and future.exception() is None and _succeeded(future.result()):
+                    if index > 0:
+                        policy.record_win()
+                    attempt_sink.copy_to(sink)
+                    return future.result()
+        return attempts[0][0].result()
+    finally:
+        for future, attempt_sink in attempts:
+            attempt_sink.cancelled = True
+            if future.done():
+                attempt_sink.buffer.close()
+
+async def run_hedged_async(attempt, sink, policy):
+    """
+    Async variant of run_hedged
+
+    Args:
+        attempt (callable): Coroutine function; attempt(sink) performs the request,
+            writes the audio to sink and returns the response
+        sink: Any object with a write(bytes) method
+        policy (HedgePolicy): Hedging policy and counters
+
+    Returns:
+        The winning response, or the first attempt's response if none succeeded
+    """
+    policy.start_request()
+    attempts = []
+
+    def launch(slot=None):
+        attempt_sink = _AttemptSink()
+        started = time.monotonic()
+
+        async def run():
+            response = None
+            try:
+                response = await attempt(attempt_sink)
+                if _succeeded(response):
+                    policy.record(time.monotonic() - started)
+                return response
+            finally:
+                if slot is not None and policy.limiter is not None:
+                    succeeded = response is not None and _succeeded(response)
+                    await policy.limiter.release(slot, _throttled(response), succeeded)
+
+        attempts.append((asyncio.ensure_future(run()), attempt_sink))
+
+    started = time.monotonic()
+    launch()
+    while True:
+        timeout = policy.next_check(time.monotonic() - started)
+        if timeout == 0:
+            slot = policy.try_hedge()
+            if slot is not None:
+                launch(slot)
+                break
+            timeout = HEDGE_RECHECK_SECONDS
+        await asyncio.wait([attempts[0][0]], timeout=timeout)
+        if attempts[0][0].done():
+            break
+
+    try:
+        pending = {task for task, _ in attempts}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for index, (task, attempt_sink) in enumerate(attempts):
+                if task in done and task.exception() is None and _succeeded(task.result()):
+                    if index > 0:
+                        policy.record_win()
+                    attempt_sink.copy_to(sink)
+                    return task.result()
+        return attempts[0][0].result()
+    finally:
+        for task, attempt_sink in attempts:
+            if not task.done():
+                task.cancel()
+                # The loser's outcome is of no interest; retrieve it so it is not logged
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            attempt_sink.buffer.close()
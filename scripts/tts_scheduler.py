@@ -0,0 +1,378 @@
+# ABOUTME: Runs TTS requests with adaptive (AIMD) concurrency and rate-limit-aware retries
+# ABOUTME: Honors Retry-After, backs off exponentially with jitter, and reports requests that never succeeded
+
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+import requests
+from scripts.azure_tts import TTSRequestError, retry_after_seconds
+
+DEFAULT_MAX_ATTEMPTS = 6
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 30.0
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit that grows additively on success and halves on throttling (AIMD)
+
+    Each slot is tagged with the limit "epoch" it was acquired in, so a burst of
+    429s from requests that were all in flight together only halves the limit once.
+    """
+
+    def __init__(self, initial, maximum, minimum=1):
+        """
+        Args:
+            initial (int): Starting number of requests in flight
+            maximum (int): Upper bound on requests in flight
+            minimum (int): Lower bound on requests in flight
+        """
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.in_flight = 0
+        self.epoch = 0
+        self.throttle_count = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """Wait for a free slot and return its epoch"""
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+            return self.epoch
+
+    def try_acquire(self):
+        """Take a free slot without waiting; returns its epoch, or None if none is free"""
+        with self._condition:
+            if self.in_flight >= int(self.limit):
+                return None
+            self.in_flight += 1
+            return self.epoch
+
+    def release(self, epoch, throttled=False, success=False):
+        """
+        Free a slot and adapt the limit to the outcome
+
+        The limit grows only on success and halves on throttling; other failures
+        (connection errors, timeouts, 5xx) leave it unchanged.
+
+        Args:
+            epoch (int): Value returned by acquire()
+            throttled (bool): The request was throttled by the service
+            success (bool): The request succeeded
+        """
+        with self._condition:
+            self._adapt(epoch, throttled, success)
+            self._condition.notify_all()
+
+    def _adapt(self, epoch, throttled, success):
+        self.in_flight -= 1
+        if throttled:
+            self.throttle_count += 1
+            if epoch == self.epoch:
+                self.limit = max(self.minimum, self.limit / 2)
+                self.epoch += 1
+                print(f"TTS throttled - reducing concurrency to {int(self.limit)}")
+        elif success:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+class AsyncAdaptiveLimiter(AdaptiveLimiter):
+    """AdaptiveLimiter for coroutines running on one event loop"""
+
+    def __init__(self, initial, maximum, minimum=1):
+        super().__init__(initial, maximum, minimum)
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        """Wait for a free slot and return its epoch"""
+        async with self._condition:
+            while self.in_flight >= int(self.limit):
+                await self._condition.wait()
+            self.in_flight += 1
+            return self.epoch
+
+    def try_acquire(self):
+        """Take a free slot without waiting (see AdaptiveLimiter.try_acquire)"""
+        # Runs between awaits on the limiter's loop, so no lock is needed
+        if self.in_flight >= int(self.limit):
+            return None
+        self.in_flight += 1
+        return self.epoch
+
+    async def release(self, epoch, throttled=False, success=False):
+        """Free a slot and adapt the limit to the outcome (see AdaptiveLimiter.release)"""
+        async with self._condition:
+            self._adapt(epoch, throttled, success)
+            self._condition.notify_all()
+
+class RetryPolicy:
+    """Retry budget with exponential backoff, full jitter and Retry-After support"""
+
+    def __init__(self, max_attempts=DEFAULT_MAX_ATTEMPTS, base_delay=DEFAULT_BASE_DELAY,
+                 max_delay=DEFAULT_MAX_DELAY):
+        """
+        Args:
+            max_attempts (int): Total attempts per request, including the first
+            base_delay (float): Backoff before the first retry, in seconds
+            max_delay (float): Upper bound on any single backoff, in seconds
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt, retry_after=None):
+        """
+        Seconds to wait before retrying
+
+        Args:
+            attempt (int): Number of attempts made so far (1 after the first failure)
+            retry_after (float, optional): Delay requested by the service
+
+        Returns:
+            float: Delay in seconds
+        """
+        if retry_after is not None:
+            # Spread out retries that were all told to come back at the same time
+            return min(self.max_delay, retry_after) + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+def _token_status(error):
+    """HTTP status of a failed token fetch (raise_for_status), or None for other errors"""
+    if isinstance(error, (requests.HTTPError, httpx.HTTPStatusError)) and error.response is not None:
+        return error.response.status_code
+    return None
+
+def is_retryable(error):
+    """Whether a failed attempt is worth retrying"""
+    if isinstance(error, TTSRequestError):
+        return error.retryable
+    status = _token_status(error)
+    if status is not None:
+        return status in (408, 429) or status >= 500
+    # ChunkedEncodingError: the connection dropped in the middle of a streamed body
+    return isinstance(error, (requests.ConnectionError, requests.Timeout,
+                              requests.exceptions.ChunkedEncodingError, httpx.TransportError))
+
+def is_throttled(error):
+    """Whether a failed attempt was the service asking us to slow down"""
+    if isinstance(error, TTSRequestError):
+        return error.throttled
+    return _token_status(error) in (429, 503)
+
+def retry_after(error):
+    """Delay requested by the service for a failed attempt, in seconds, or None"""
+    if isinstance(error, TTSRequestError):
+        return error.retry_after
+    if _token_status(error) is not None:
+        return retry_after_seconds(error.response)
+    return None
+
+class TTSScheduler:
+    """Runs TTS tasks through an AdaptiveLimiter with per-task retries"""
+
+    def __init__(self, max_concurrency, initial_concurrency=None, retry_policy=None):
+        """
+        Args:
+            max_concurrency (int): Upper bound on requests in flight
+            initial_concurrency (int, optional): Starting number of requests in flight.
+                Defaults to half of max_concurrency
+            retry_policy (RetryPolicy, optional): Retry budget and backoff
+        """
+        if initial_concurrency is None:
+            initial_concurrency = max(1, max_concurrency // 2)
+        self.max_concurrency = max_concurrency
+        self.limiter = AdaptiveLimiter(initial_concurrency, max_concurrency)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.retry_count = 0
+        self._stats_lock = threading.Lock()
+
+    def _retry_delay(self, index, total, attempt, error):
+        """Seconds to wait before the next attempt, or raise error if the budget is spent"""
+        if not is_retryable(error) or attempt >= self.retry_policy.max_attempts:
+            print(f"Error: TTS request {index+1}/{total} failed after {attempt} attempt(s): {error}")
+            raise error
+
+        delay = self.retry_policy.delay(attempt, retry_after(error))
+        print(f"TTS request {index+1}/{total} failed ({error}); retrying in {delay:.1f}s")
+        with self._stats_lock:
+            self.retry_count += 1
+        return delay
+
+    def _run_and_report(self, index, task, total, on_complete):
+        try:
+            result = self._run_task(index, task, total)
+        except Exception as e:
+            if on_complete is not None:
+                on_complete(index, None, e)
+            raise
+        if on_complete is not None:
+            on_complete(index, result, None)
+        return result
+
+    def _run_task(self, index, task, total):
+        attempt = 0
+        while True:
+            attempt += 1
+            epoch = self.limiter.acquire()
+            throttled = succeeded = False
+            try:
+                result = task()
+                succeeded = True
+                return result
+            except Exception as e:
+                throttled = is_throttled(e)
+                error = e
+            finally:
+                self.limiter.release(epoch, throttled, succeeded)
+            time.sleep(self._retry_delay(index, total, attempt, error))
+
+    def run(self, tasks, on_complete=None):
+        """
+        Run tasks (zero-argument callables) and collect their results
+
+        Args:
+            tasks (list): The tasks, each performing one TTS request
+            on_complete (callable, optional): Called as on_complete(index, result, error)
+                from the worker as soon as each task succeeds or exhausts its retries
+
+        Returns:
+            tuple: (results in task order with None for failed tasks,
+                    list of (task index, exception) for tasks that exhausted their retries)
+        """
+        results = [None] * len(tasks)
+        failures = []
+        workers = max(1, min(self.max_concurrency, len(tasks) or 1))
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self._run_and_report, i, task, len(tasks), on_complete)
+                       for i, task in enumerate(tasks)]
+            for i, future in enumerate(futures):
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    failures.append((i, e))
+
+        self._report(len(tasks), len(failures))
+        return results, failures
+
+    def _report(self, total, failed):
+        print(f"TTS scheduler: {total - failed}/{total} requests succeeded, "
+              f"{self.retry_count} retries, {self.limiter.throttle_count} throttled responses, "
+              f"final concurrency {int(self.limiter.limit)}")
+
+class AsyncTTSScheduler(TTSScheduler):
+    """TTSScheduler for coroutine tasks, all running on one event loop"""
+
+    def __init__(self, max_concurrency, initial_concurrency=None, retry_policy=None):
+        super().__init__(max_concurrency, initial_concurrency, retry_policy)
+        self.limiter = AsyncAdaptiveLimiter(self.limiter.limit, max_concurrency)
+
+    async def _run_and_report_async(self, index, task, total, on_complete):
+        try:
+            result = await self._run_task_async(index, task, total)
+        except Exception as e:
+            if on_complete is not None:
+                on_complete(index, None, e)
+            raise
+        if on_complete is not None:
+            on_complete(index, result, None)
+        return result
+
+    async def _run_task_async(self, index, task, total):
+        attempt = 0
+        while True:
+            attempt += 1
+            epoch = await self.limiter.acquire()
+            throttled = succeeded = False
+            try:
+                result = await task()
+                succeeded = True
+                return result
+            except Exception as e:
+                throttled = is_throttled(e)
+                error = e
+            finally:
+                await self.limiter.release(epoch, throttled, succeeded)
+            await asyncio.sleep(self._retry_delay(index, total, attempt, error))
+
+    async def run_async(self, tasks, on_complete=None):
+        """
+        Run tasks (zero-argument coroutine functions) concurrently and collect their results
+
+        Args:
+            tasks (list): The tasks, each performing one TTS request
+            on_complete (callable, optional): Called as on_complete(index, result, error)
+                on the event loop as soon as each task succeeds or exhausts its retries
+
+        Returns:
+            tuple: (results in task order with None for failed tasks,
+                    list of (task index, exception) for tasks that exhausted their retries)
+        """
+        outcomes = await asyncio.gather(
+            *(self._run_and_report_async(i, task, len(tasks), on_complete) for i, task in enumerate(tasks)),
+            return_exceptions=True
+        )
+        results = [None] * len(tasks)
+        failures = []
+        for i, outcome in enumerate(outcomes):
+            if isinstance(outcome, BaseException):
+                failures.append((i, outcome))
+            else:
+                results[i] = outcome
+
+        self._report(len(tasks), len(failures))
+        return results, failures
+
+class ResultBoard:
+    """
+    Hands task results to a consumer in task order while the tasks are still running
+
+    The scheduler reports each task through report() (pass it as on_complete);
+    the consumer blocks in get() until the task it needs next has finished.
+    """
+
+    def __init__(self, count):
+        """
+        Args:
+            count (int): Number of tasks
+        """
+        self._outcomes = [None] * count
+        self._condition = threading.Condition()
+
+    def report(self, index, result, error=None):
+        """Record the outcome of a task (result on success, error on failure)"""
+        with self._condition:
+            self._outcomes[index] = (result, error)
+            self._condition.notify_all()
+
+    def close(self, error):
+        """Fail every task that has not reported yet, e.g. because the producer died"""
+        with self._condition:
+            for index, outcome in enumerate(self._outcomes):
+                if outcome is None:
+                    self._outcomes[index] = (None, error)
+            self._condition.notify_all()
+
+    def completed(self):
+        """Results of the tasks that have succeeded so far"""
+        with self._condition:
+            return [outcome[0] for outcome in self._outcomes if outcome is not None and outcome[1] is None]
+
+    def get(self, index):
+        """
+        Wait for a task to finish and return its result
+
+        Raises:
+            Exception: The error the task failed with
+        """
+        with self._condition:
+            while self._outcomes[index] is None:
+                self._condition.wait()
+            result, error = self._outcomes[index]
+        if error is not None:
+            raise error
+        return result
@@ -0,0 +1,208 @@
+# ABOUTME: Local stand-in for the Azure TTS REST API, for exercising the podcast TTS path offline
+# ABOUTME: Renders SSML text as a tone and breaks as silence, and reports bookmark offsets
+
+import argparse
+import random
+import threading
+import time
+import xml.etree.ElementTree as ET
+from array import array
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import io
+import math
+import wave
+
+SAMPLE_RATE = 24000  # Matches riff-24khz-16bit-mono-pcm
+MS_PER_CHARACTER = 65  # Roughly the pace of a neural voice
+SENTENCE_PAUSE_MS = 300
+TONE_HZ = 400
+
+SSML_NAMESPACE = "{http://www.w3.org/2001/10/synthesis}"
+
+# One period of the tone, repeated to render speech
+_TONE_PERIOD = array('h', (int(8000 * math.sin(2 * math.pi * i * TONE_HZ / SAMPLE_RATE))
+                           for i in range(SAMPLE_RATE // TONE_HZ))).tobytes()
+
+def _frames_for_ms(ms):
+    return int(SAMPLE_RATE * ms / 1000)
+
+def _tone(ms):
+    periods = math.ceil(_frames_for_ms(ms) * 2 / len(_TONE_PERIOD))
+    return (_TONE_PERIOD * periods)[:_frames_for_ms(ms) * 2]
+
+def _silence(ms):
+    return bytes(_frames_for_ms(ms) * 2)
+
+def _parse_break_ms(value):
+    value = (value or '').strip()
+    if value.endswith('ms'):
+        return float(value[:-2])
+    if value.endswith('s'):
+        return float(value[:-1]) * 1000
+    return 0.0
+
+def render_ssml(ssml):
+    """
+    Render an SSML document to 16-bit mono PCM
+
+    Args:
+        ssml (str or bytes): The SSML document
+
+    Returns:
+        tuple: (PCM bytes, dict of bookmark name -> offset in milliseconds)
+    """
+    pcm = bytearray()
+    bookmarks = {}
+
+    def speak(text):
+        for sentence in (text or '').replace('!', '.').replace('?', '.').split('.'):
+            if sentence.strip():
+                pcm.extend(_tone(len(sentence.strip()) * MS_PER_CHARACTER))
+                pcm.extend(_silence(SENTENCE_PAUSE_MS))
+
+    def walk(element):
+        speak(element.text)
+        for child in element:
+            tag = child.tag.replace(SSML_NAMESPACE, '')
+            if tag == 'bookmark':
+                bookmarks[child.get('mark')] = len(pcm) / 2 / SAMPLE_RATE * 1000
+            elif tag == 'break':
+                pcm.extend(_silence(_parse_break_ms(child.get('time'))))
+            else:
+                walk(child)
+            speak(child.tail)
+
+    walk(ET.fromstring(ssml))
+    return bytes(pcm), bookmarks
+
+def _wav_bytes(pcm):
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(SAMPLE_RATE)
+        writer.writeframes(pcm)
+    return buffer.getvalue()
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """Serves the token and synthesis endpoints of the Azure TTS REST API"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def handle(self):
+        try:
+            super().handle()
+        except (ConnectionResetError, BrokenPipeError):
+            pass  # Client went away, e.g. the losing attempt of a hedged request
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _reply(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with self.server.stats_lock:
+            self.server.stats['requests'] += 1
+
+        if self.path.endswith('/issueToken'):
+            with self.server.stats_lock:
+                self.server.stats['tokens'] += 1
+            self._reply(200, b'standin-token')
+            return
+
+        if not self.path.endswith('/cognitiveservices/v1'):
+            self._reply(404, b'Not found')
+            return
+        if not self.headers.get('Authorization', '').startswith('Bearer '):
+            self._reply(401, b'Missing bearer token')
+            return
+
+        server = self.server
+        with server.stats_lock:
+            over_limit = server.max_concurrent is not None and server.in_flight >= server.max_concurrent
+            if over_limit:
+                server.stats['throttled'] += 1
+            else:
+                server.in_flight += 1
+        if over_limit:
+            self._reply(429, b'Too many requests', {'Retry-After': str(server.retry_after)})
+            return
+        try:
+            latency_ms = server.latency_ms
+            if server.slow_fraction and random.random() < server.slow_fraction:
+                latency_ms += server.slow_ms
+                with server.stats_lock:
+                    server.stats['slow'] += 1
+            if latency_ms:
+                time.sleep(latency_ms / 1000)
+            pcm, bookmarks = render_ssml(body)
+        finally:
+            with server.stats_lock:
+                server.in_flight -= 1
+
+        headers = {'Content-Type': 'audio/wav'}
+        if bookmarks:
+            headers['X-Bookmark-Offsets'] = ';'.join(f"{mark}={offset:.0f}" for mark, offset in bookmarks.items())
+        with self.server.stats_lock:
+            self.server.stats['syntheses'] += 1
+        self._reply(200, _wav_bytes(pcm), headers)
+
+def start_standin_server(port=0, verbose=False, latency_ms=0, max_concurrent=None, retry_after=1,
+                         slow_fraction=0.0, slow_ms=0):
+    """
+    Start the stand-in server on a background thread
+
+    Args:
+        port (int): Port to listen on (0 picks a free port)
+        verbose (bool): Log every request
+        latency_ms (float): Added latency per synthesis request
+        max_concurrent (int, optional): Answer 429 when more syntheses than this are in flight
+        retry_after (float): Retry-After value sent with 429 responses, in seconds
+        slow_fraction (float): Share of synthesis requests that get slow_ms of extra latency
+        slow_ms (float): Extra latency of the slow requests, to exercise request hedging
+
+    Returns:
+        ThreadingHTTPServer: The running server; its base URL is
+            f"http://127.0.0.1:{server.server_address[1]}"
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), StandinHandler)
+    server.daemon_threads = True
+    server.verbose = verbose
+    server.latency_ms = latency_ms
+    server.max_concurrent = max_concurrent
+    server.retry_after = retry_after
+    server.slow_fraction = slow_fraction
+    server.slow_ms = slow_ms
+    server.in_flight = 0
+    server.stats = {'requests': 0, 'tokens': 0, 'syntheses': 0, 'throttled': 0, 'slow': 0}
+    server.stats_lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the Azure TTS REST API")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0, help="Added latency per synthesis request")
+    parser.add_argument('--max-concurrent', type=int, help="Throttle (429) above this many requests in flight")
+    parser.add_argument('--retry-after', type=float, default=1, help="Retry-After sent with 429 responses")
+    parser.add_argument('--slow-fraction', type=float, default=0, help="Share of requests that are slow")
+    parser.add_argument('--slow-ms', type=float, default=0, help="Extra latency of slow requests")
+    args = parser.parse_args()
+
+    server = start_standin_server(args.port, verbose=True, latency_ms=args.latency_ms,
+                                  max_concurrent=args.max_concurrent, retry_after=args.retry_after,
+                                  slow_fraction=args.slow_fraction, slow_ms=args.slow_ms)
+    print(f"Stand-in TTS server listening on http://127.0.0.1:{args.port}")
+    print(f"Run the podcast creator with AZURE_TTS_ENDPOINT=http://127.0.0.1:{args.port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
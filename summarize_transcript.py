@@ -236,20 +236,17 @@ def main():
     
     # First, fetch new newsletters
     print("\nFetching newsletter content...")
-    from scripts.email_newsletter_retrieval import fetch_newsletter_from_email
+    from scripts.email_newsletter_retrieval import fetch_newsletter_from_email, format_newsletter
     newsletters = fetch_newsletter_from_email()
     
     # Write newsletters to file if we got any
     if newsletters:
         with open("outputs/newsletter_content.txt", "w", encoding="utf-8") as f:
-            combined_content = ""
             for newsletter in newsletters:
-                print(f"Retrieved: {newsletter['subject']} ({newsletter['date']})")
+                print(f"Retrieved: {newsletter.title} ({newsletter.published_sast})")
                 print("\nEXCERPT:")
-                print(newsletter['content'][:200] + "...\n")
-                combined_content += f"=== {newsletter['subject']} - {newsletter['date']} ===\n\n"
-                combined_content += newsletter['content'] + "\n\n"
-            f.write(combined_content)
+                print(newsletter.body[:200] + "...\n")
+            f.write("".join(format_newsletter(newsletter) for newsletter in newsletters))
             print("\nFull newsletters saved to outputs/newsletter_content.txt")
     else:
         print("No recent newsletters found - clearing old content")
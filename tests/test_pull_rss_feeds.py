@@ -0,0 +1,23 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+from scripts.pull_rss_feeds import (STALE_ITEMS_BEFORE_STOP, FeedSource, iter_feed_items,
+                                    process_feed_items)
+
+def _feed(ages_hours):
+    now = datetime.now(timezone.utc)
+    items = ''.join(f"<item><title>story {i}</title>"
+                    f"<pubDate>{format_datetime(now - timedelta(hours=age))}</pubDate></item>"
+                    for i, age in enumerate(ages_hours))
+    return f'<?xml version="1.0"?><rss version="2.0"><channel>{items}</channel></rss>'.encode()
+
+def _titles(ages_hours):
+    source = FeedSource("Test", "http://feed.invalid/", date_sorted=True)
+    return [article.title for article in process_feed_items(iter_feed_items(_feed(ages_hours)), source)]
+
+def test_out_of_order_old_item_does_not_hide_later_articles():
+    assert _titles([1, 2, 30, 3, 4]) == ['story 0', 'story 1', 'story 3', 'story 4']
+
+def test_reading_stops_after_a_run_of_old_items():
+    ages = [1] + [30] * STALE_ITEMS_BEFORE_STOP + [2]
+    assert _titles(ages) == ['story 0']